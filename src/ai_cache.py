@@ -0,0 +1,105 @@
+import os
+import time
+import json
+import hashlib
+from collections import OrderedDict
+
+# Answers to AI questions, so a script asking the same thing in a loop only
+# goes to the network once. Two levels: an in-memory LRU, and optionally a
+# SQLite file shared by every Genesis process (batch and server workers too).
+# Entries older than the TTL count as missing. Failed questions are never
+# cached here: ai_engine's cooldown handles a failing endpoint.
+
+class ResponseCache:
+    def __init__(self, ttl=3600, max_entries=256, path=None, max_disk_entries=10000):
+        self.ttl = ttl # Seconds an answer stays good
+        self.max_entries = max_entries
+        self.memory = OrderedDict() # key -> (answer, stored at), least recently used first
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.db = None # Opened on first use
+
+        self.hits = 0
+        self.disk_hits = 0 # Hits that had to come from the disk store
+        self.misses = 0
+
+    @staticmethod
+    def key(model, system_prompt, question):
+        data = json.dumps([model, system_prompt, question])
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    # The disk store blocks: ai_engine calls disk_get and disk_put on a
+    # thread of their own, and the rest from its event loop.
+
+    def recall(self, key):
+        """ The answer from memory, or None (look on disk next). """
+        entry = self.memory.get(key)
+        if entry is not None:
+            answer, stored_at = entry
+            if time.time() - stored_at < self.ttl:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return answer
+            del self.memory[key]
+        return None
+
+    def reload(self, key, entry):
+        """ The answer from disk_get's entry (None if there was none), or None for a miss. """
+        if entry is not None:
+            answer, stored_at = entry
+            if time.time() - stored_at < self.ttl:
+                self.remember(key, answer, stored_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return answer
+        self.misses += 1
+        return None
+
+    def remember(self, key, answer, stored_at):
+        self.memory[key] = (answer, stored_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.memory),
+        }
+
+    # --- Disk store ---
+
+    def database(self):
+        if self.db is None and self.path:
+            import sqlite3
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # The AI client calls from its own thread
+            self.db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT, stored_at REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS answers_age ON answers (stored_at)")
+        return self.db
+
+    def disk_get(self, key):
+        try:
+            db = self.database()
+            if db is None: return None
+            return db.execute("SELECT answer, stored_at FROM answers WHERE key = ?", (key,)).fetchone()
+        except Exception:
+            return None # A broken store just means asking again
+
+    def disk_put(self, key, answer, stored_at):
+        try:
+            db = self.database()
+            if db is None: return
+            with db:
+                db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", (key, answer, stored_at))
+                # Drop expired answers, then the oldest ones over the limit
+                db.execute("DELETE FROM answers WHERE stored_at < ?", (stored_at - self.ttl,))
+                db.execute("DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                           (self.max_disk_entries,))
+        except Exception:
+            pass
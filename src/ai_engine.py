@@ -1,57 +1,378 @@
 import os
+import ssl
 import random
-import urllib.request
 import json
 import sys
+import time
+import asyncio
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin, unquote
+from ai_cache import ResponseCache
 
 # Provided by user for public use
 # WARNING: Exposing API keys in public code is risky.
 # Only do this if you intend to share this specific key limit.
 DEFAULT_KEY = "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"
 
+# Use a model that is generally available on OpenRouter
+# google/gemini-pro is often free or cheap, openai/gpt-3.5-turbo is standard
+DEFAULT_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODEL = "openai/gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are the AI baked into the Genesis Programming Language. Answer concisely and creatively."
+
+def configure():
+    """ (Re)reads the GENESIS_AI_* settings from the environment. """
+    global ENDPOINT, MODEL, TIMEOUT, MAX_CONNECTIONS, CACHE_TTL, CACHE_SIZE, CACHE_FILE, CACHE_DISK_SIZE, COOLDOWN
+    # Point GENESIS_AI_URL at a local stub (ai_stub.py) to try things offline
+    ENDPOINT = os.getenv("GENESIS_AI_URL", DEFAULT_URL)
+    MODEL = os.getenv("GENESIS_AI_MODEL", DEFAULT_MODEL)
+    TIMEOUT = float(os.getenv("GENESIS_AI_TIMEOUT", "30")) # Seconds per question
+    # Kept-alive connections to the endpoint, and so questions in flight at once
+    MAX_CONNECTIONS = int(os.getenv("GENESIS_AI_CONNECTIONS", "32"))
+
+    # Answers are reused for CACHE_TTL seconds (0 turns the cache off), in memory
+    # and, with GENESIS_AI_CACHE_FILE set, on disk for other runs too.
+    CACHE_TTL = float(os.getenv("GENESIS_AI_CACHE_TTL", "3600"))
+    CACHE_SIZE = int(os.getenv("GENESIS_AI_CACHE_SIZE", "256"))
+    CACHE_FILE = os.getenv("GENESIS_AI_CACHE_FILE")
+    CACHE_DISK_SIZE = int(os.getenv("GENESIS_AI_CACHE_DISK_SIZE", "10000"))
+    # After a failure, answer in Vibe Mode for this many seconds without trying
+    COOLDOWN = float(os.getenv("GENESIS_AI_COOLDOWN", "30"))
+
+configure()
+
+NO_CHOICE = "AI Error: No response choice returned."
+REDIRECTS = (301, 302, 303, 307, 308)
+SAME_METHOD = (307, 308) # The others are followed with a GET, as urllib does
+MAX_REDIRECTS = 5
+
 def ask(question):
-    # check for api key in env, otherwise use default
-    api_key = os.getenv("OPENAI_API_KEY", DEFAULT_KEY)
-    
-    # Try using OpenRouter (compatible with OpenAI client structure)
-    try:
-        url = "https://openrouter.ai/api/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-            # OpenRouter specific headers for better ranking/logging if needed, optional
-            # "HTTP-Referer": "https://github.com/rubenthampy890-del/genesis-lang",
-            # "X-Title": "Genesis Language"
-        }
-        
-        # Use a model that is generally available on OpenRouter
-        # google/gemini-pro is often free or cheap, openai/gpt-3.5-turbo is standard
-        data = json.dumps({
-            "model": "openai/gpt-3.5-turbo", 
+    """ The answer to a question, waiting for it. """
+    return ask_async(question).result()
+
+def ask_async(question):
+    """
+    Sends a question and returns at once with a concurrent.futures.Future
+    for the answer, so many questions can be on their way at the same time.
+    The future never fails: errors and timeouts answer with vibe_check().
+    """
+    ai = client()
+    return asyncio.run_coroutine_threadsafe(ai.answer(question), ai.loop)
+
+def reset_stats():
+    """ Counts from zero again: each script run reports only its own questions. """
+    if _client is None: return
+    _client.requests = _client.offline = 0
+    if _client.cache:
+        _client.cache.hits = _client.cache.disk_hits = _client.cache.misses = 0
+
+def stats():
+    """ Cache and fallback counters since reset_stats(), or None if nothing was asked yet. """
+    if _client is None: return None
+    counters = _client.cache.stats() if _client.cache else {}
+    counters["requests"] = _client.requests
+    counters["offline"] = _client.offline
+    return counters
+
+_client = None
+_client_lock = threading.Lock()
+
+def reset():
+    """
+    Reads the settings again and drops the shared client: the next question
+    starts a new one. For server workers, where each run brings its client's
+    environment.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.stop()
+            _client = None
+        configure()
+
+def client():
+    """ The shared AIClient, started on first use. """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AIClient(ENDPOINT)
+        return _client
+
+class Origin:
+    """
+    Where requests for one scheme://host:port go: straight there, or through
+    the proxy HTTP(S)_PROXY names (unless NO_PROXY exempts the host), as
+    urllib would. Keeps that origin's idle kept-alive connections.
+    """
+    def __init__(self, scheme, host, port):
+        self.secure = scheme == "https"
+        self.host = host
+        self.port = port or (443 if self.secure else 80)
+        self.proxy = proxy_for(scheme, host)
+        self.idle = [] # (reader, writer) connections ready for another request
+
+        address = f"[{host}]" if ":" in host else host # IPv6 literals are bracketed
+        self.authority = f"{address}:{self.port}" # For CONNECT
+        # The Host header names the port unless it is the scheme's default
+        self.host_header = address if self.port == (443 if self.secure else 80) else self.authority
+
+    def proxy_headers(self):
+        if self.proxy is None or self.proxy.username is None:
+            return {}
+        credentials = f"{unquote(self.proxy.username)}:{unquote(self.proxy.password or '')}"
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode('utf-8')).decode('ascii')}
+
+def proxy_for(scheme, host):
+    """ The proxy (split into parts) to reach host through, or None. """
+    import urllib.request # Only for its reading of the *_PROXY variables
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+class AIClient:
+    """
+    Chat completions over pooled keep-alive HTTP/1.1 connections, driven
+    by an asyncio loop on a background thread (the interpreter itself
+    stays synchronous and just holds on to futures). Goes through the
+    configured proxy (CONNECT tunnels for https) and follows redirects.
+    """
+    def __init__(self, url, max_connections=MAX_CONNECTIONS):
+        self.url = url
+        self.origins = {} # (scheme, host, port) -> Origin
+        self.max_connections = max_connections
+        self.slots = None # Semaphore, made on the loop
+
+        self.cache = ResponseCache(CACHE_TTL, CACHE_SIZE, CACHE_FILE, CACHE_DISK_SIZE) if CACHE_TTL > 0 else None
+        # The cache's SQLite store, one call at a time on its own thread
+        self.disk = ThreadPoolExecutor(1, thread_name_prefix="genesis-ai-cache")
+        self.in_flight = {} # key -> Task, so the same question asked twice at once is sent once
+        self.down_until = 0 # While time.monotonic() is below this, don't even try
+        self.requests = 0 # Questions that went to the network
+        self.offline = 0  # Questions answered by vibe_check() during a cooldown
+
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, name="genesis-ai", daemon=True)
+        thread.start()
+
+    def stop(self):
+        """ Closes the idle connections and ends the loop's thread; questions still in flight are dropped. """
+        def shut_down():
+            for origin in self.origins.values():
+                for connection in origin.idle:
+                    self.close(connection)
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(shut_down)
+        self.disk.shutdown(wait=False) # Answers being stored still are
+
+    def origin(self, parts):
+        key = (parts.scheme, parts.hostname, parts.port)
+        if key not in self.origins:
+            self.origins[key] = Origin(*key)
+        return self.origins[key]
+
+    async def answer(self, question):
+        key = ResponseCache.key(MODEL, SYSTEM_PROMPT, question)
+        if self.cache:
+            cached = self.cache.recall(key)
+            if cached is None:
+                # SQLite off the loop: other questions keep going while the disk is busy
+                entry = await self.loop.run_in_executor(self.disk, self.cache.disk_get, key) if self.cache.path else None
+                cached = self.cache.reload(key, entry)
+            if cached is not None:
+                return cached
+
+        if time.monotonic() < self.down_until:
+            self.offline += 1
+            return vibe_check(question)
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = self.loop.create_task(self.fetch(key, question))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.in_flight.pop(key, None))
+        answer = await task
+        return answer if answer is not None else vibe_check(question)
+
+    async def fetch(self, key, question):
+        """ The answer from the endpoint, or None if that failed. """
+        self.requests += 1
+        try:
+            answer = await asyncio.wait_for(self.chat(question), TIMEOUT)
+        except Exception as e:
+            # If network fails or key is bad, fall back to "Vibe Mode"
+            # Print error to stderr so user knows why it failed (once per outage)
+            if time.monotonic() >= self.down_until:
+                reason = f"timed out after {TIMEOUT:g}s" if isinstance(e, asyncio.TimeoutError) else e
+                sys.stderr.write(f"\n[AI Warning] Connection failed: {reason}. Switching to Vibe Mode.\n")
+            self.down_until = time.monotonic() + COOLDOWN
+            return None
+
+        if self.cache and answer != NO_CHOICE:
+            stored_at = time.time()
+            self.cache.remember(key, answer, stored_at)
+            if self.cache.path:
+                # Not waited for: the answer needn't wait on the disk
+                self.loop.run_in_executor(self.disk, self.cache.disk_put, key, answer, stored_at)
+        return answer
+
+    async def chat(self, question):
+        api_key = os.getenv("OPENAI_API_KEY", DEFAULT_KEY)
+        body = json.dumps({
+            "model": MODEL,
             "messages": [
-                {"role": "system", "content": "You are the AI baked into the Genesis Programming Language. Answer concisely and creatively."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": question}
             ]
         }).encode('utf-8')
-        
-        req = urllib.request.Request(url, data, headers)
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read())
-            if 'choices' in result and len(result['choices']) > 0:
-                return result['choices'][0]['message']['content'].strip()
-            return "AI Error: No response choice returned."
-            
-    except Exception as e:
-        # If network fails or key is bad, fall back to "Vibe Mode"
-        # Print error to stderr so user knows why it failed
-        sys.stderr.write(f"\n[AI Warning] Connection failed: {e}. Switching to Vibe Mode.\n")
-        return vibe_check(question)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        }
+
+        url, method = self.url, "POST"
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, data = await self.request(method, url, body, headers)
+            if status not in REDIRECTS or "location" not in response_headers:
+                break
+            url = urljoin(url, response_headers["location"])
+            if status not in SAME_METHOD:
+                # Not safe to send the question again: just fetch what we were sent to
+                method, body = "GET", None
+                headers = {name: value for name, value in headers.items() if name != "Content-Type"}
+        else:
+            raise ConnectionError(f"More than {MAX_REDIRECTS} redirects")
+        if status != 200:
+            raise ConnectionError(f"HTTP {status}")
+        result = json.loads(data)
+        if 'choices' in result and len(result['choices']) > 0:
+            return result['choices'][0]['message']['content'].strip()
+        return NO_CHOICE
+
+    async def request(self, method, url, body, headers):
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_connections)
+
+        parts = urlsplit(url)
+        origin = self.origin(parts)
+        if origin.proxy is not None and not origin.secure:
+            # Plain http through a proxy: the whole URL goes in the request line
+            target = url.split("#")[0]
+        else:
+            target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+        async with self.slots:
+            if origin.idle:
+                try:
+                    return await self.send(origin, origin.idle.pop(), method, target, body, headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    pass # The server dropped a kept-alive connection: once more on a new one
+            return await self.send(origin, await self.connect(origin), method, target, body, headers)
+
+    async def send(self, origin, connection, method, target, body, headers):
+        try:
+            status, response_headers, data = await self.exchange(origin, connection, method, target, body, headers)
+        except BaseException:
+            # Failed, timed out or cancelled half way: the connection's state is unknown
+            self.close(connection)
+            raise
+
+        if response_headers.get("connection", "").lower() != "close":
+            origin.idle.append(connection)
+        else:
+            self.close(connection)
+        return status, response_headers, data
+
+    async def connect(self, origin):
+        context = ssl.create_default_context() if origin.secure else None
+        proxy = origin.proxy
+        if proxy is None:
+            return await asyncio.open_connection(origin.host, origin.port, ssl=context)
+
+        proxy_context = ssl.create_default_context() if proxy.scheme == "https" else None
+        reader, writer = await asyncio.open_connection(
+            proxy.hostname, proxy.port or (443 if proxy_context else 80), ssl=proxy_context)
+        if not origin.secure:
+            return reader, writer
+
+        # https through a proxy: a CONNECT tunnel to the origin, then TLS inside it
+        try:
+            lines = [f"CONNECT {origin.authority} HTTP/1.1", f"Host: {origin.authority}"]
+            lines += [f"{name}: {value}" for name, value in origin.proxy_headers().items()]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+            await writer.drain()
+            status = await self.read_status(reader)
+            await self.read_headers(reader)
+            if status != 200:
+                raise ConnectionError(f"Proxy refused the tunnel: HTTP {status}")
+            await writer.start_tls(context, server_hostname=origin.host)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def close(self, connection):
+        reader, writer = connection
+        writer.close()
+
+    async def exchange(self, origin, connection, method, target, body, headers):
+        """ One request/response on a connection: (status, headers, body); headers say if it can be reused. """
+        reader, writer = connection
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {origin.host_header}", "Connection: keep-alive"]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        if not origin.secure:
+            headers = {**headers, **origin.proxy_headers()}
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (body or b""))
+        await writer.drain()
+
+        status = await self.read_status(reader)
+        response_headers = await self.read_headers(reader)
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await self.read_chunked(reader)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            # Body runs until the server closes the connection
+            data = await reader.read()
+            response_headers["connection"] = "close"
+        return status, response_headers, data
+
+    async def read_status(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        return int(status_line.split()[1])
+
+    async def read_headers(self, reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def read_chunked(self, reader):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2) # CRLF after each chunk
 
 def vibe_check(question):
     q = question.lower()
     if "hello" in q: return "Greetings, creator. The code vibes are strong. (Offline Mode)"
     if "meaning" in q: return "42. (But try connecting to the internet for a better answer!)"
-    
+
     responses = [
         "That's deep. Let me compute... Done. Result: Awesome.",
         "I'm feeling a bit binary today, ask me about 0s and 1s.",
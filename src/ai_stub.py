@@ -0,0 +1,58 @@
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A stand-in for the AI endpoint, for trying 'ask' offline:
+#
+#   python3 ai_stub.py --port 8765 --delay 0.5 &
+#   GENESIS_AI_URL=http://127.0.0.1:8765/v1/chat/completions python3 main.py script.gen
+#
+# Answers every chat completion with an echo of the question after --delay
+# seconds, like a slow model would, over keep-alive HTTP/1.1 connections.
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real endpoint
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        question = request["messages"][-1]["content"]
+        time.sleep(self.server.delay)
+
+        body = json.dumps({
+            "model": request.get("model"),
+            "choices": [{"message": {"role": "assistant", "content": f"You asked: {question}"}}],
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write(f"[stub {self.client_address[1]}] {format % args}\n")
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # Many connections arrive at once
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="genesis-ai-stub", description="Local stand-in for the AI endpoint")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--delay", type=float, default=0.0, help="seconds before each answer")
+    arg_parser.add_argument("--verbose", action="store_true", help="log every request (with the client port)")
+    args = arg_parser.parse_args()
+
+    server = StubServer(("127.0.0.1", args.port), StubHandler)
+    server.delay = args.delay
+    server.verbose = args.verbose
+    print(f"🤖 AI stub on http://127.0.0.1:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
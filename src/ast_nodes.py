@@ -1,20 +1,30 @@
+# Every node class lists its fields in __slots__: no per-node __dict__,
+# which keeps big parsed programs small (see benchmark.py --memory).
+
 from abc import ABC, abstractmethod
 
 class Expr(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor):
         pass
 
 class Binary(Expr):
+    __slots__ = ('left', 'operator', 'right', 'operation')
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
+        self.operation = None # Operator function, set by the Resolver
 
     def accept(self, visitor):
         return visitor.visit_binary_expr(self)
 
 class Grouping(Expr):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -22,6 +32,8 @@ class Grouping(Expr):
         return visitor.visit_grouping_expr(self)
 
 class Literal(Expr):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -29,21 +41,30 @@ class Literal(Expr):
         return visitor.visit_literal_expr(self)
 
 class Unary(Expr):
+    __slots__ = ('operator', 'right', 'operation')
+
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
+        self.operation = None # Operator function, set by the Resolver
 
     def accept(self, visitor):
         return visitor.visit_unary_expr(self)
 
 class Variable(Expr):
+    __slots__ = ('name', 'depth', 'slot')
+
     def __init__(self, name):
         self.name = name
+        self.depth = None # Set by the Resolver (None = global)
+        self.slot = None
 
     def accept(self, visitor):
         return visitor.visit_variable_expr(self)
         
 class Logical(Expr):
+    __slots__ = ('left', 'operator', 'right')
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -53,19 +74,32 @@ class Logical(Expr):
         return visitor.visit_logical_expr(self)
 
 class Assign(Expr):
+    __slots__ = ('name', 'value', 'depth', 'slot', 'appends')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.depth = None # Set by the Resolver (None = global)
+        self.slot = None
+        # 'update s to s plus a plus b': the 'plus' Binary nodes, innermost
+        # first (set by the Resolver), so text can be appended in place
+        self.appends = None
     
     def accept(self, visitor):
         return visitor.visit_assign_expr(self)
 
 class Stmt(ABC):
+    # Source line the statement starts on, set by the Parser (for --profile);
+    # statements the parser makes up, like the Block of a postfix 'check', have none
+    __slots__ = ('line',)
+
     @abstractmethod
     def accept(self, visitor):
         pass
 
 class Expression(Stmt):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -73,6 +107,8 @@ class Expression(Stmt):
         return visitor.visit_expression_stmt(self)
 
 class Print(Stmt):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -80,14 +116,19 @@ class Print(Stmt):
         return visitor.visit_print_stmt(self)
 
 class Var(Stmt):
+    __slots__ = ('name', 'initializer', 'slot')
+
     def __init__(self, name, initializer):
         self.name = name
         self.initializer = initializer
+        self.slot = None # Set by the Resolver (None = global)
 
     def accept(self, visitor):
         return visitor.visit_var_stmt(self)
 
 class Block(Stmt):
+    __slots__ = ('statements',)
+
     def __init__(self, statements):
         self.statements = statements
 
@@ -95,6 +136,8 @@ class Block(Stmt):
         return visitor.visit_block_stmt(self)
 
 class If(Stmt):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
         self.then_branch = then_branch
@@ -104,6 +147,8 @@ class If(Stmt):
         return visitor.visit_if_stmt(self)
 
 class While(Stmt):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
@@ -112,15 +157,21 @@ class While(Stmt):
         return visitor.visit_while_stmt(self)
 
 class Function(Stmt):
+    __slots__ = ('name', 'params', 'body', 'slot', 'size')
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
         self.body = body
+        self.slot = None # Set by the Resolver (None = global)
+        self.size = 0    # Frame slots for params and locals (params first)
 
     def accept(self, visitor):
         return visitor.visit_function_stmt(self)
 
 class Return(Stmt):
+    __slots__ = ('keyword', 'value')
+
     def __init__(self, keyword, value):
         self.keyword = keyword
         self.value = value
@@ -129,6 +180,8 @@ class Return(Stmt):
         return visitor.visit_return_stmt(self)
 
 class Call(Expr):
+    __slots__ = ('callee', 'paren', 'arguments')
+
     def __init__(self, callee, paren, arguments):
         self.callee = callee
         self.paren = paren # The 'with' or 'call' token for error reporting
@@ -138,6 +191,8 @@ class Call(Expr):
         return visitor.visit_call_expr(self)
     
 class Use(Stmt):
+    __slots__ = ('module_name',)
+
     def __init__(self, module_name):
         self.module_name = module_name # Token or string
 
@@ -145,9 +200,152 @@ class Use(Stmt):
         return visitor.visit_use_stmt(self)
 
 class PythonAccess(Expr):
+    __slots__ = ('property_chain', 'depth', 'slot', 'cache')
+
     def __init__(self, property_chain):
         self.property_chain = property_chain # List of identifiers/strings
+        self.depth = None # Base name address, set by the Resolver (None = global/module)
+        self.slot = None
+        self.cache = None # bridge.InlineCache, set by the Resolver
     
     def accept(self, visitor):
         return visitor.visit_python_access_expr(self)
 
+
+
+# v5 Nodes
+
+class Times(Stmt):
+    __slots__ = ('count', 'body')
+
+    def __init__(self, count, body):
+        self.count = count
+        self.body = body # A single statement repeated 'count' times
+
+    def accept(self, visitor):
+        return visitor.visit_times_stmt(self)
+
+class Speak(Stmt):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def accept(self, visitor):
+        return visitor.visit_speak_stmt(self)
+
+class Ask(Stmt):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def accept(self, visitor):
+        return visitor.visit_ask_stmt(self)
+
+class Draw(Stmt):
+    __slots__ = ('command', 'arguments')
+
+    def __init__(self, command, arguments):
+        self.command = command
+        self.arguments = arguments
+
+    def accept(self, visitor):
+        return visitor.visit_draw_stmt(self)
+
+
+# v6 Nodes
+
+class ListLiteral(Expr):
+    __slots__ = ('elements',)
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    def accept(self, visitor):
+        return visitor.visit_list_expr(self)
+
+class MapLiteral(Expr):
+    __slots__ = ('brace', 'keys', 'values')
+
+    def __init__(self, brace, keys, values):
+        self.brace = brace # '{' Token, for error reporting
+        self.keys = keys
+        self.values = values
+
+    def accept(self, visitor):
+        return visitor.visit_map_expr(self)
+
+class Index(Expr):
+    """ object[index] """
+    __slots__ = ('object', 'bracket', 'index')
+
+    def __init__(self, object, bracket, index):
+        self.object = object
+        self.bracket = bracket # '[' Token, for error reporting
+        self.index = index
+
+    def accept(self, visitor):
+        return visitor.visit_index_expr(self)
+
+class SetIndex(Expr):
+    """ update object[index] to value """
+    __slots__ = ('object', 'bracket', 'index', 'value')
+
+    def __init__(self, object, bracket, index, value):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visit_set_index_expr(self)
+
+class ForEach(Stmt):
+    """ for each item in list do ... end """
+    __slots__ = ('keyword', 'name', 'iterable', 'body', 'slot')
+
+    def __init__(self, keyword, name, iterable, body):
+        self.keyword = keyword # 'for' Token, for error reporting
+        self.name = name
+        self.iterable = iterable
+        self.body = body
+        self.slot = None # The item variable's slot, set by the Resolver
+
+    def accept(self, visitor):
+        return visitor.visit_for_each_stmt(self)
+
+class CallOver(Expr):
+    """ call python f over items: the list of f(item) for every item """
+    __slots__ = ('callee', 'paren', 'iterable')
+
+    def __init__(self, callee, paren, iterable):
+        self.callee = callee
+        self.paren = paren # For error reporting, like Call.paren
+        self.iterable = iterable
+
+    def accept(self, visitor):
+        return visitor.visit_call_over_expr(self)
+
+class Flush(Stmt):
+    """ flush: write out what 'say' has buffered so far """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visit_flush_stmt(self)
+
+class Parallel(Expr):
+    """ for each item in list in parallel do ... end: the list of what each iteration returned. """
+    __slots__ = ('keyword', 'name', 'iterable', 'body', 'workers', 'mode', 'size')
+
+    def __init__(self, keyword, name, iterable, body, workers, mode):
+        self.keyword = keyword   # 'for' Token, for error reporting
+        self.name = name         # The item variable
+        self.iterable = iterable
+        self.body = body         # Statements, run like a function body for each item
+        self.workers = workers   # Pool size expression, or None for the default
+        self.mode = mode         # "threads" or "processes" (None: the Resolver picks)
+        self.size = 0            # Frame slots per iteration (the item first), set by the Resolver
+
+    def accept(self, visitor):
+        return visitor.visit_parallel_expr(self)
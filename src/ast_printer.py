@@ -10,7 +10,8 @@ class AstPrinter:
     def visit_block_stmt(self, stmt):
         builder = "(block "
         for statement in stmt.statements:
-            builder += str(statement.accept(self)) + " "
+            if statement:
+                builder += str(statement.accept(self)) + " "
         builder += ")"
         return builder
 
@@ -32,6 +33,36 @@ class AstPrinter:
 
     def visit_while_stmt(self, stmt):
         return self.parenthesize2("while", stmt.condition, stmt.body)
+
+    def visit_times_stmt(self, stmt):
+        return self.parenthesize2("times", stmt.count, stmt.body)
+
+    def visit_for_each_stmt(self, stmt):
+        return self.parenthesize2("for-each", stmt.name, stmt.iterable, stmt.body)
+
+    def visit_function_stmt(self, stmt):
+        params = "(" + " ".join(param.lexeme for param in stmt.params) + ")"
+        return self.parenthesize2("fun", stmt.name, params, Block(stmt.body))
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is None:
+            return "(return)"
+        return self.parenthesize("return", stmt.value)
+
+    def visit_use_stmt(self, stmt):
+        return f"(use python {stmt.module_name})"
+
+    def visit_flush_stmt(self, stmt):
+        return "(flush)"
+
+    def visit_speak_stmt(self, stmt):
+        return self.parenthesize("speak", stmt.expression)
+
+    def visit_ask_stmt(self, stmt):
+        return self.parenthesize("ask", stmt.expression)
+
+    def visit_draw_stmt(self, stmt):
+        return self.parenthesize("draw", stmt.command, *stmt.arguments)
     
     def visit_assign_expr(self, expr):
         return self.parenthesize2("=", expr.name, expr.value)
@@ -55,6 +86,33 @@ class AstPrinter:
     def visit_logical_expr(self, expr):
         return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
 
+    def visit_call_expr(self, expr):
+        return self.parenthesize("call", expr.callee, *expr.arguments)
+
+    def visit_call_over_expr(self, expr):
+        return self.parenthesize("call-over", expr.callee, expr.iterable)
+
+    def visit_python_access_expr(self, expr):
+        return "python " + ".".join(expr.property_chain)
+
+    def visit_list_expr(self, expr):
+        return self.parenthesize("list", *expr.elements)
+
+    def visit_map_expr(self, expr):
+        entries = [self.parenthesize(":", key, value) for key, value in zip(expr.keys, expr.values)]
+        return self.parenthesize2("map", *entries)
+
+    def visit_index_expr(self, expr):
+        return self.parenthesize("index", expr.object, expr.index)
+
+    def visit_set_index_expr(self, expr):
+        return self.parenthesize("set-index", expr.object, expr.index, expr.value)
+
+    def visit_parallel_expr(self, expr):
+        workers = expr.workers if expr.workers else "default"
+        name = f"parallel-{expr.mode}" if expr.mode else "parallel"
+        return self.parenthesize2(name, expr.name, expr.iterable, workers, Block(expr.body))
+
     def parenthesize(self, name, *exprs):
         builder = f"({name}"
         for expr in exprs:
@@ -0,0 +1,150 @@
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from main import run_file, report_bridge_stats, report_ai_stats, ENGINES, DEFAULT_ENGINE
+import cache
+
+# Batch runner: executes many .gen scripts across a pool of worker
+# processes, each script in a fresh interpreter, and reports per-script
+# output, timing and status plus a summary. Workers are started once, so
+# scripts don't each pay for Python startup and imports.
+#
+#   python3 batch.py examples/ "jobs/**/*.gen" --jobs 8
+
+class ScriptResult:
+    def __init__(self, path, ok, output, elapsed):
+        self.path = path
+        self.ok = ok           # False if the script had a syntax or runtime error
+        self.output = output   # Everything it printed
+        self.elapsed = elapsed # Seconds
+
+    @property
+    def exit_status(self):
+        return 0 if self.ok else 1
+
+def collect_scripts(targets):
+    """ .gen files from directories (searched recursively), globs and plain paths, in order. """
+    scripts = []
+    for target in targets:
+        if os.path.isdir(target):
+            for root, dirs, files in os.walk(target):
+                dirs[:] = sorted(d for d in dirs if d != cache.CACHE_DIR)
+                scripts.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".gen"))
+        elif glob.has_magic(target):
+            scripts.extend(sorted(glob.glob(target, recursive=True)))
+        else:
+            scripts.append(target)
+
+    # A script named twice (e.g. by a directory and a glob) runs once
+    seen = set()
+    return [s for s in scripts if not (s in seen or seen.add(s))]
+
+def run_script(path, engine=DEFAULT_ENGINE, optimize=True, use_cache=True, dump_ast=False, output_path=None,
+               bridge_stats=False, profile=False, ai_stats=False, stdout=None, stderr=None):
+    """
+    Runs one script in this (worker) process and captures what it prints.
+    Given stdout (and stderr) streams, it is written there as it is printed
+    instead, and the result's output is empty.
+    """
+    captured = io.StringIO() if stdout is None else None
+    stdout = stdout or captured
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr or stdout):
+        try:
+            ok = run_file(path, engine, optimize, dump_ast, use_cache, output_path, profile)
+            if bridge_stats:
+                report_bridge_stats()
+            if ai_stats:
+                report_ai_stats()
+        except BaseException as e:
+            # e.g. a Python function called with 'call python' exiting
+            print(f"❌ Script Error: {e!r}")
+            ok = False
+    output = captured.getvalue() if captured else ""
+    return ScriptResult(path, ok, output, time.perf_counter() - start)
+
+def run_batch(scripts, jobs=None, **options):
+    """ Yields a ScriptResult per script, in the order given, as they finish. """
+    # Deep Genesis recursion on the tree-walker needs Python stack
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        futures = [pool.submit(run_script, path, **options) for path in scripts]
+        for index, path in enumerate(scripts):
+            try:
+                yield futures[index].result()
+                continue
+            except BrokenProcessPool:
+                pass
+            # A worker died (a crash, os._exit, the OOM killer) and took the pool
+            # with it, maybe while running another script: run this one alone to
+            # tell, then carry on with a new pool
+            yield run_alone(path, options)
+            pool.shutdown(cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            for later in range(index + 1, len(scripts)):
+                if not finished(futures[later]):
+                    futures[later] = pool.submit(run_script, scripts[later], **options)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def finished(future):
+    return future.done() and not future.cancelled() and future.exception() is None
+
+def run_alone(path, options):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(run_script, path, **options).result()
+        except BrokenProcessPool:
+            return ScriptResult(path, False, "❌ The process running this script died.\n", 0)
+
+def report(result, show_output=True):
+    status = "✅" if result.ok else "❌"
+    print(f"{status} {result.path}  ({result.elapsed * 1000:.1f} ms, exit {result.exit_status})")
+    if show_output and result.output:
+        for line in result.output.rstrip("\n").split("\n"):
+            print(f"   │ {line}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="genesis-batch", description="Run many Genesis scripts in parallel")
+    arg_parser.add_argument("targets", nargs="+", help="directories, globs or .gen files")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="worker processes (default: one per CPU)")
+    arg_parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE)
+    arg_parser.add_argument("--no-optimize", dest="optimize", action="store_false")
+    arg_parser.add_argument("--no-cache", dest="use_cache", action="store_false")
+    arg_parser.add_argument("-q", "--quiet", action="store_true",
+                            help="don't show each script's output")
+    args = arg_parser.parse_args()
+
+    scripts = collect_scripts(args.targets)
+    if not scripts:
+        print("❌ No .gen scripts found.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    failed = []
+    script_time = 0
+    for result in run_batch(scripts, args.jobs, engine=args.engine,
+                            optimize=args.optimize, use_cache=args.use_cache):
+        report(result, show_output=not args.quiet)
+        script_time += result.elapsed
+        if not result.ok:
+            failed.append(result.path)
+    wall_time = time.perf_counter() - start
+
+    print("\n📊 Summary")
+    print(f"   {len(scripts) - len(failed)} passed, {len(failed)} failed, {len(scripts)} total")
+    print(f"   Wall time {wall_time:.2f}s, script time {script_time:.2f}s")
+    for path in failed:
+        print(f"   ❌ {path}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
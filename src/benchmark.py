@@ -0,0 +1,162 @@
+import sys
+import io
+import time
+import contextlib
+import tracemalloc
+from main import run, ENGINES
+from lexer import Lexer
+from parser import Parser
+from ast_nodes import Expr, Stmt
+
+# Micro benchmarks for the Genesis runtime.
+# Each one runs a Genesis program on every engine and reports the cost of
+# one iteration, with the cost of the bare loop (the 'baseline') taken out.
+
+LOOP = """
+set i to 0
+loop while i is less than {n} do
+    {body}
+    update i to i plus 1
+end
+"""
+
+BENCHMARKS = {
+    # Call/return of a small helper, like 'add' in examples/test_functions.gen
+    "calls": {
+        "setup": """
+to add with x, y do
+    return x plus y
+end
+""",
+        "body": "call add with i, 1",
+        "iterations": 100000,
+    },
+    # Scale and sum a 1M number series with element-wise math (see lists.py)
+    "series": {
+        "setup": """
+set series to call range with 0, 1000000
+""",
+        "body": "set total to call sum with series times 2 plus 1",
+        "iterations": 10,
+    },
+    # Build a report of ~5 MB a line at a time (see Resolver.appends)
+    "report": {
+        "setup": """
+set report to ""
+""",
+        "body": 'update report to report plus "Row " plus i plus ": all systems nominal, nothing to report." plus " "',
+        "iterations": 100000,
+    },
+    # A Python function called through the bridge every iteration (see bridge.py)
+    "bridge": {
+        "setup": """
+use python "math"
+""",
+        "body": "set root to call python math.sqrt with i",
+        "iterations": 100000,
+    },
+    # The same function over a 1M number series in one bridge call (see bridge.call_over)
+    "over": {
+        "setup": """
+use python "math"
+set series to call range with 0, 1000000
+""",
+        "body": "set roots to call python math.sqrt over series",
+        "iterations": 10,
+    },
+}
+
+# One chunk of a large generated script for --memory; {i} keeps names unique
+MEMORY_CHUNK = """
+to scale{i} with x, y do
+    set total to x times y plus {i}
+    check total is greater than 100 then
+        return total over 2
+    otherwise
+        return total minus 1
+    end
+end
+set value{i} to call scale{i} with {i}, 3
+loop while value{i} is less than 1000 do
+    update value{i} to value{i} plus 1
+end
+say "Value " plus value{i}
+"""
+MEMORY_CHUNKS = 5000
+
+def count_nodes(node):
+    # Walks the node's fields (they are all in __slots__)
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if not isinstance(node, (Expr, Stmt)):
+        return 0
+    total = 1
+    for cls in type(node).__mro__:
+        for field in getattr(cls, '__slots__', ()):
+            total += count_nodes(getattr(node, field, None))
+    return total
+
+def allocated_by(function):
+    """ Returns (result, bytes still allocated when function returns). """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def memory_benchmark():
+    source = "".join(MEMORY_CHUNK.format(i=i) for i in range(MEMORY_CHUNKS))
+    lines = source.count("\n")
+
+    # Tokens: the objects plus their lexemes and literals, and the list
+    tokens, token_bytes = allocated_by(lambda: Lexer(source).scan_tokens())
+    # Nodes: everything parsing adds on top of the tokens it points to
+    statements, node_bytes = allocated_by(lambda: Parser(tokens).parse())
+    nodes = count_nodes(statements)
+
+    print(f"memory ({lines} lines, {len(source) / 1024:.0f} KiB of source)")
+    print(f"   tokens {len(tokens):8}  {token_bytes / len(tokens):6.1f} bytes per token  ({token_bytes / 1024:.0f} KiB)")
+    print(f"   nodes  {nodes:8}  {node_bytes / nodes:6.1f} bytes per node   ({node_bytes / 1024:.0f} KiB)")
+
+def time_program(source, engine):
+    interpreter = ENGINES[engine]()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(source, interpreter)
+    return time.perf_counter() - start
+
+def best_of(repeat, source, engine):
+    return min(time_program(source, engine) for _ in range(repeat))
+
+def run_benchmark(name, repeat=3):
+    spec = BENCHMARKS[name]
+    n = spec["iterations"]
+    baseline = LOOP.format(n=n, body="")
+    program = spec["setup"] + LOOP.format(n=n, body=spec["body"])
+
+    print(f"{name} ({n} iterations, best of {repeat})")
+    for engine in ENGINES:
+        loop_time = best_of(repeat, baseline, engine)
+        total = best_of(repeat, program, engine)
+        per_iteration = (total - loop_time) / n * 1e6
+        print(f"   {engine:<5} {per_iteration:8.2f} µs per iteration  (total {total:.2f}s, loop alone {loop_time:.2f}s)")
+
+def main():
+    # Deep Genesis recursion on the tree-walker needs Python stack
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    if "--memory" in sys.argv[1:]:
+        memory_benchmark()
+        return
+
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return
+    for name in names:
+        run_benchmark(name)
+
+if __name__ == '__main__':
+    main()
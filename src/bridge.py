@@ -0,0 +1,97 @@
+from array import array
+from types import ModuleType, FunctionType, BuiltinFunctionType
+from values import RuntimeError, NumberList, List
+from lists import numpy, numbers, iterate
+
+# Inline caches for Python bridge chains like 'python math.sqrt'.
+#
+# Every PythonAccess node (and PYTHON_ACCESS instruction) has an InlineCache
+# holding what its chain resolved to last time, and for which base object.
+# While the base is the same object (the module hasn't been swapped for
+# another, the variable not reassigned) the getattr walk is skipped.
+#
+# Only lookups that stay stable are cached: module attributes that are
+# modules, functions or classes. Anything else ('python sys.stdout',
+# 'python resp.code') can change under us and is looked up every time.
+# A 'use' drops every cached chain, in case it (re)loaded something.
+
+hits = 0
+misses = 0
+generation = 0 # Bumped by invalidate(); entries from older generations are stale
+
+STABLE_TYPES = (ModuleType, FunctionType, BuiltinFunctionType, type)
+
+class InlineCache:
+    __slots__ = ('entry',)
+
+    def __init__(self):
+        # (base object, generation, value), replaced as a whole so threads
+        # sharing the node never see half an entry
+        self.entry = (None, -1, None)
+
+def invalidate():
+    global generation
+    generation += 1
+
+def resolve(cache, chain, obj):
+    """ The value of chain[1:] looked up on obj, from the cache when it is still valid. """
+    global hits, misses
+    base, seen, value = cache.entry
+    if base is obj and seen == generation:
+        hits += 1
+        return value
+    misses += 1
+
+    base = obj
+    cacheable = True
+    for prop in chain[1:]:
+        cacheable = cacheable and type(obj) is ModuleType
+        try:
+            obj = getattr(obj, prop)
+        except AttributeError:
+            raise RuntimeError(None, f"Object '{chain[0]}' has no attribute '{prop}'.")
+
+    if cacheable and isinstance(obj, STABLE_TYPES):
+        cache.entry = (base, generation, obj)
+    return obj
+
+# --- call python f over items ---
+
+def call_over(paren, function, items):
+    """
+    function(item) for every item, as one map() (or one NumPy ufunc call)
+    rather than a Genesis call per item. A NumberList comes back as a
+    NumberList when all the results are numbers, anything else as a list.
+    """
+    np = numpy()
+    try:
+        if np is not None and isinstance(function, np.ufunc):
+            # Vectorized: the whole list in a single call
+            results = function(numbers(paren, items))
+            if isinstance(results, np.ndarray) and results.dtype.kind in "fiu":
+                return NumberList(results.astype(float))
+            return List(results.tolist()) if isinstance(results, np.ndarray) else results
+        results = List(map(function, iterate(paren, items)))
+    except RuntimeError as e:
+        if e.token is None: e.token = paren
+        raise
+    except Exception as e:
+        raise RuntimeError(paren, f"Python Error: {e}")
+
+    if isinstance(items, NumberList) and set(map(type, results)) <= {int, float}:
+        return NumberList(np.array(results, dtype=float) if np is not None else array('d', results))
+    return results
+
+def reset_stats():
+    """ Counts from zero again: each script run reports only its own lookups. """
+    global hits, misses
+    hits = misses = 0
+
+def stats():
+    """ Lookup counters for every chain since reset_stats(). """
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
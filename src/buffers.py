@@ -0,0 +1,85 @@
+from values import RuntimeError, Bytes, NumberList, is_number
+
+# Natives for slicing and searching text, lists and Bytes (raw bytes from
+# the Python bridge, see values.Bytes), and for turning bytes into text and
+# back. On Bytes, slice and find work on the memory in place:
+#
+#   set page to call python response.read     # Bytes, not copied
+#   set start to call find with page, "<title>"
+#   set head to call slice with page, 0, 1024 # Still the same memory
+#   say call decode with head
+
+def whole(value, what):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if type(value) is not int:
+        raise RuntimeError(None, f"The {what} must be a whole number.")
+    return value
+
+def slice_of(value, start, end=None):
+    # 'slice': items start up to (not including) end; minus counts from the end
+    start = whole(start, "start")
+    end = None if end is None else whole(end, "end")
+    if isinstance(value, NumberList):
+        return NumberList(value.data[start:end])
+    if isinstance(value, (str, list, tuple, Bytes)):
+        return value[start:end]
+    raise RuntimeError(None, "Can only slice text, lists and bytes.")
+
+def find(value, part, start=0):
+    # 'find': where part first appears (from start), or nothing
+    start = whole(start, "start")
+    if isinstance(value, Bytes):
+        index = find_bytes(value, needle(part), start)
+    elif isinstance(value, str):
+        if not isinstance(part, str):
+            raise RuntimeError(None, "Can only find text in text.")
+        index = value.find(part, start)
+    elif isinstance(value, (list, tuple, NumberList)):
+        index = next((i for i in range(*slice(start, None).indices(len(value))) if value[i] == part), -1)
+    else:
+        raise RuntimeError(None, "Can only search text, lists and bytes.")
+    return None if index < 0 else index
+
+def find_bytes(value, part, start):
+    begin, end = value.start, value.start + len(value)
+    start = slice(start, None).indices(len(value))[0]
+    data = value.view.obj
+    if hasattr(data, "find"):
+        # bytes and mmap search in place, within the view's part of them
+        index = data.find(part, begin + start, end)
+        return index - begin if index >= 0 else -1
+    return value.view.tobytes().find(part, start)
+
+def needle(part):
+    if isinstance(part, Bytes):
+        return part.view
+    if isinstance(part, str):
+        return part.encode("utf-8")
+    if is_number(part) and 0 <= part < 256 and float(part).is_integer():
+        return bytes([int(part)])
+    raise RuntimeError(None, "Can only look for bytes, text or a byte value in bytes.")
+
+def decode(value, encoding="utf-8"):
+    # The only way from bytes to text
+    if not isinstance(value, Bytes):
+        raise RuntimeError(None, "Can only decode bytes.")
+    try:
+        return value.decode(encoding)
+    except (UnicodeDecodeError, LookupError) as e:
+        raise RuntimeError(None, f"Can't decode these bytes: {e}")
+
+def encode(text, encoding="utf-8"):
+    if not isinstance(text, str):
+        raise RuntimeError(None, "Can only encode text.")
+    try:
+        return Bytes.of(text.encode(encoding))
+    except (UnicodeEncodeError, LookupError) as e:
+        raise RuntimeError(None, f"Can't encode this text: {e}")
+
+NATIVES = {
+    "slice": slice_of,
+    "find": find,
+    "decode": decode,
+    "encode": encode,
+}
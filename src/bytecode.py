@@ -0,0 +1,129 @@
+from bisect import bisect_right
+from enum import IntEnum, auto
+
+class OpCode(IntEnum):
+    # Every instruction is two words wide: [op, arg]. Ops that don't need an
+    # argument carry None (or the operator Token, for error reporting).
+
+    # Stack
+    CONST = auto()          # arg: the constant value
+    POP = auto()
+
+    # Variables (addresses come from the Resolver)
+    # SET_* is 'update' (leaves the value on the stack), DEFINE_* is 'set' (pops)
+    GET_GLOBAL = auto()     # arg: variable name
+    SET_GLOBAL = auto()
+    DEFINE_GLOBAL = auto()
+    GET_LOCAL = auto()      # arg: slot in the current frame
+    SET_LOCAL = auto()
+    DEFINE_LOCAL = auto()
+    GET_OUTER = auto()      # arg: (depth, slot) in an enclosing (closure) frame
+    SET_OUTER = auto()
+
+    # Math / Logic (arg: operator Token)
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    GREATER = auto()
+    LESS = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    NEGATE = auto()
+    NOT = auto()
+
+    # Control flow (arg: target instruction index)
+    JUMP = auto()
+    JUMP_IF_FALSE = auto()          # pops the condition
+    JUMP_IF_FALSE_OR_POP = auto()   # 'and' short circuit
+    JUMP_IF_TRUE_OR_POP = auto()    # 'or' short circuit
+    START_REPEAT = auto()           # turn the count on top of stack into a counter
+    REPEAT = auto()                 # 'N times': decrement counter or exit loop
+
+    # Functions
+    CALL = auto()          # arg: (argument count, paren Token)
+    RETURN = auto()
+    MAKE_FUNCTION = auto() # arg: CodeObject (captures the current frame)
+
+    # Statements
+    PRINT = auto()
+    USE = auto()           # arg: python module name
+    PYTHON_ACCESS = auto() # arg: (property chain, depth, slot, bridge.InlineCache)
+    SPEAK = auto()
+    ASK = auto()
+    DRAW = auto()          # arg: argument count
+
+    # v6
+    BUILD_LIST = auto()    # arg: item count
+    BUILD_MAP = auto()     # arg: (entry count, '{' Token); keys and values alternate
+    GET_INDEX = auto()     # arg: '[' Token; pops index, object
+    SET_INDEX = auto()     # arg: '[' Token; pops value, index, object, pushes value
+    APPEND_GLOBAL = auto() # arg: (name, 'plus' Tokens); 'update s to s plus ...', pops the pieces and s
+    APPEND_LOCAL = auto()  # arg: (slot, 'plus' Tokens)
+    GET_ITER = auto()      # arg: 'for' Token; turn the list on top of stack into an iterator
+    FOR_EACH = auto()      # arg: loop exit; push the next item, or pop the iterator and exit
+    PARALLEL = auto()      # arg: (body CodeObject, mode, 'for' Token); pops workers, list
+    FLUSH = auto()
+    CALL_OVER = auto()     # arg: paren Token; pops the list and the function, pushes the results
+
+
+class CodeObject:
+    """ A compiled function (or the top level script) as one flat instruction array. """
+    def __init__(self, name, params=(), size=0):
+        self.name = name
+        self.params = list(params)
+        self.size = size # Frame slots needed by a call (params first)
+        self.code = []
+        self.lines = [] # (instruction index, source line) where each statement's code starts
+
+    def emit(self, op, arg=None):
+        self.code.append(int(op)) # Plain ints keep the VM's dispatch comparisons cheap
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, index, target):
+        self.code[index + 1] = target
+
+    def here(self):
+        return len(self.code)
+
+    def mark_line(self, line):
+        if self.lines and self.lines[-1][0] == len(self.code):
+            self.lines.pop() # Nothing emitted for the previous statement yet
+        if not self.lines or self.lines[-1][1] != line:
+            self.lines.append((len(self.code), line))
+
+    def line_at(self, index):
+        """ The source line of the instruction at index, or None. """
+        position = bisect_right(self.lines, (index, float("inf")))
+        return self.lines[position - 1][1] if position else None
+
+    def nested(self):
+        """ The CodeObjects of functions (and parallel loop bodies) defined in this one. """
+        for arg in self.code[1::2]:
+            if isinstance(arg, CodeObject):
+                yield arg
+            elif isinstance(arg, tuple):
+                yield from (part for part in arg if isinstance(part, CodeObject))
+
+    def disassemble(self):
+        lines = [f"== {self.name} =="]
+        for index in range(0, len(self.code), 2):
+            op = OpCode(self.code[index])
+            arg = self.code[index + 1]
+            lines.append(f"{index:04d} {op.name:<22}{format_arg(arg)}")
+        for code in self.nested():
+            lines.append("")
+            lines.append(code.disassemble())
+        return "\n".join(lines)
+
+def format_arg(arg):
+    if arg is None:
+        return ""
+    if isinstance(arg, CodeObject):
+        return f"<code {arg.name}>"
+    if hasattr(arg, 'lexeme'):
+        return arg.lexeme # Operator / paren Token
+    if isinstance(arg, tuple):
+        return "(" + ", ".join(format_arg(part) or "None" for part in arg) + ")"
+    return repr(arg)
@@ -0,0 +1,66 @@
+import os
+import sys
+import pickle
+import hashlib
+
+# Compile cache for .gen files, in the spirit of Python's __pycache__.
+#
+# Running a script stores its parsed, optimized and resolved program in
+# __genesiscache__/<script>.cache next to it. The next run loads that
+# instead of lexing and parsing again, as long as the source hash, the
+# Genesis version and the optimize setting still match.
+
+GENESIS_VERSION = "5.0"
+# Bump whenever AST nodes, Resolver annotations or operators change shape,
+# so caches written by an older Genesis are rebuilt instead of loaded.
+FORMAT_VERSION = 11
+CACHE_TAG = f"genesis-{GENESIS_VERSION}.{FORMAT_VERSION}-py{sys.version_info[0]}{sys.version_info[1]}"
+
+CACHE_DIR = "__genesiscache__"
+CACHE_SUFFIX = ".cache"
+
+def cache_path(script_path):
+    directory, filename = os.path.split(os.path.abspath(script_path))
+    return os.path.join(directory, CACHE_DIR, filename + CACHE_SUFFIX)
+
+def source_hash(source):
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+def load(script_path, source, optimize):
+    """ Returns (statements, frame_size) from a valid cache entry, or None. """
+    try:
+        with open(cache_path(script_path), 'rb') as file:
+            entry = pickle.load(file)
+    except Exception:
+        # Missing, unreadable or written by something else: just recompile
+        return None
+
+    if entry.get("tag") != CACHE_TAG: return None
+    if entry.get("hash") != source_hash(source): return None
+    if entry.get("optimize") != optimize: return None
+    return entry["statements"], entry["frame_size"]
+
+def store(script_path, source, optimize, statements, frame_size):
+    """ Best effort: a read-only directory or an unpicklable program just isn't cached. """
+    path = cache_path(script_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    entry = {
+        "tag": CACHE_TAG,
+        "hash": source_hash(source),
+        "optimize": optimize,
+        "statements": statements,
+        "frame_size": frame_size,
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic, so concurrent runs never see half a cache file
+        os.replace(temp_path, path)
+        return True
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except Exception:
+            pass
+        return False
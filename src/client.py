@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import socket
+
+# Thin client for the Genesis server (server.py), a drop-in replacement for
+# 'python3 main.py ...': script runs are sent to the running server's
+# pre-warmed workers, everything else (the REPL, --precompile, or no server
+# running) falls back to running main.py in this process.
+#
+# Kept to the standard library's lightest modules: for short scripts the
+# client's own startup is most of the wait.
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Options that only make sense in a process of their own
+LOCAL_ONLY = {"--precompile", "--startup-profile", "-h", "--help"}
+
+# Environment variables a script run takes from the client, not the server
+FORWARDED_PREFIXES = ("GENESIS_", "OPENAI_")
+FORWARDED_NAMES = {"http_proxy", "https_proxy", "all_proxy", "no_proxy"} # In either case
+
+def forwarded_environment(environ):
+    return {name: value for name, value in environ.items()
+            if name.startswith(FORWARDED_PREFIXES) or name.lower() in FORWARDED_NAMES}
+
+def socket_path():
+    """ Where the server listens: $GENESIS_SOCKET, or one socket per user. """
+    if os.environ.get("GENESIS_SOCKET"):
+        return os.environ["GENESIS_SOCKET"]
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(directory, f"genesis-{os.getuid()}.sock")
+
+def connect(request, path=None, timeout=None):
+    """ A connection with the request sent (as a line of JSON), or None if no server is listening. """
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(path or socket_path())
+    except OSError:
+        return None
+    connection.sendall(json.dumps(request).encode('utf-8') + b"\n")
+    return connection
+
+def send(request, path=None, timeout=None):
+    """ One request, one response (both a line of JSON). None if no server is listening. """
+    connection = connect(request, path, timeout)
+    if connection is None: return None
+    with connection:
+        data = connection.makefile('rb').readline()
+    return json.loads(data) if data else None
+
+def run_remote(argv):
+    """
+    Runs a script on the server, writing what it prints as it prints it.
+    The server answers with a line of JSON per piece of output
+    ({"output": ...} or {"error": ...}) and one with the exit status last.
+    Returns the exit status, or None if no server is listening.
+    """
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": forwarded_environment(os.environ),
+        "interactive": sys.stdout.isatty(), # Line by line output, as on a terminal
+    }
+    connection = connect(request)
+    if connection is None: return None
+
+    with connection:
+        for data in connection.makefile('rb'):
+            message = json.loads(data)
+            if "output" in message:
+                sys.stdout.write(message["output"])
+                sys.stdout.flush()
+            if "error" in message:
+                sys.stderr.write(message["error"])
+                sys.stderr.flush()
+            if "status" in message:
+                return message["status"]
+    # Already running: don't run the script a second time here
+    sys.stderr.write("❌ Lost the connection to the Genesis server.\n")
+    return 1
+
+def is_script_run(argv):
+    if any(arg in LOCAL_ONLY for arg in argv): return False
+    return any(arg.endswith(".gen") for arg in argv)
+
+def main():
+    argv = sys.argv[1:]
+    if is_script_run(argv):
+        status = run_remote(argv)
+        if status is not None:
+            sys.exit(status)
+
+    # No server: do what the 'genesis' wrapper always did
+    os.execv(sys.executable, [sys.executable, MAIN] + argv)
+
+if __name__ == '__main__':
+    main()
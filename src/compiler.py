@@ -0,0 +1,278 @@
+from tokens import TokenType
+from ast_nodes import *
+from bytecode import OpCode, CodeObject
+
+# Operator token -> opcode for Binary / Unary nodes
+BINARY_OPS = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.TIMES: OpCode.MULTIPLY,
+    TokenType.OVER: OpCode.DIVIDE,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.IS: OpCode.EQUAL,
+    TokenType.NOT: OpCode.NOT_EQUAL, # 'is not'
+}
+
+UNARY_OPS = {
+    TokenType.MINUS: OpCode.NEGATE,
+    TokenType.NOT: OpCode.NOT,
+}
+
+class Compiler:
+    """
+    Lowers the AST into flat bytecode for the VM (see vm.py).
+    Each function body gets its own CodeObject; the script itself is '<script>'.
+    Statements must already be annotated by the Resolver.
+    """
+    def __init__(self):
+        self.chunk = None
+
+    def compile(self, statements, frame_size=0):
+        self.chunk = CodeObject("<script>", size=frame_size)
+        for statement in statements:
+            if statement:
+                self.statement(statement)
+        self.chunk.emit(OpCode.CONST, None)
+        self.chunk.emit(OpCode.RETURN)
+        return self.chunk
+
+    def statement(self, stmt):
+        line = getattr(stmt, 'line', None)
+        if line is not None:
+            self.chunk.mark_line(line) # For --profile
+        stmt.accept(self)
+
+    def expression(self, expr):
+        expr.accept(self)
+
+    # --- Statements ---
+
+    def visit_expression_stmt(self, stmt):
+        self.expression(stmt.expression)
+        self.chunk.emit(OpCode.POP)
+
+    def visit_print_stmt(self, stmt):
+        self.expression(stmt.expression)
+        self.chunk.emit(OpCode.PRINT)
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer != None:
+            self.expression(stmt.initializer)
+        else:
+            self.chunk.emit(OpCode.CONST, None)
+        self.define(stmt.name.lexeme, stmt.slot)
+
+    def define(self, name, slot):
+        if slot is None:
+            self.chunk.emit(OpCode.DEFINE_GLOBAL, name)
+        else:
+            self.chunk.emit(OpCode.DEFINE_LOCAL, slot)
+
+    def visit_block_stmt(self, stmt):
+        # Block locals already have slots in the enclosing frame
+        self.block(stmt.statements)
+
+    def block(self, statements):
+        for statement in statements:
+            # A parse error leaves a None in the block; there is nothing to run.
+            if statement:
+                self.statement(statement)
+
+    def visit_if_stmt(self, stmt):
+        self.expression(stmt.condition)
+        else_jump = self.chunk.emit(OpCode.JUMP_IF_FALSE)
+        self.statement(stmt.then_branch)
+
+        if stmt.else_branch != None:
+            end_jump = self.chunk.emit(OpCode.JUMP)
+            self.chunk.patch(else_jump, self.chunk.here())
+            self.statement(stmt.else_branch)
+            self.chunk.patch(end_jump, self.chunk.here())
+        else:
+            self.chunk.patch(else_jump, self.chunk.here())
+
+    def visit_while_stmt(self, stmt):
+        loop_start = self.chunk.here()
+        self.expression(stmt.condition)
+        exit_jump = self.chunk.emit(OpCode.JUMP_IF_FALSE)
+        self.statement(stmt.body)
+        self.chunk.emit(OpCode.JUMP, loop_start)
+        self.chunk.patch(exit_jump, self.chunk.here())
+
+    def visit_times_stmt(self, stmt):
+        self.expression(stmt.count)
+        self.chunk.emit(OpCode.START_REPEAT)
+        loop_start = self.chunk.emit(OpCode.REPEAT)
+        self.statement(stmt.body)
+        self.chunk.emit(OpCode.JUMP, loop_start)
+        self.chunk.patch(loop_start, self.chunk.here())
+
+    def visit_for_each_stmt(self, stmt):
+        self.expression(stmt.iterable)
+        self.chunk.emit(OpCode.GET_ITER, stmt.keyword)
+        loop_start = self.chunk.emit(OpCode.FOR_EACH)
+        self.chunk.emit(OpCode.DEFINE_LOCAL, stmt.slot)
+        self.statement(stmt.body)
+        self.chunk.emit(OpCode.JUMP, loop_start)
+        self.chunk.patch(loop_start, self.chunk.here())
+
+    def visit_function_stmt(self, stmt):
+        enclosing = self.chunk
+        self.chunk = CodeObject(stmt.name.lexeme, [param.lexeme for param in stmt.params], stmt.size)
+        self.block(stmt.body)
+        self.chunk.emit(OpCode.CONST, None)
+        self.chunk.emit(OpCode.RETURN)
+        function = self.chunk
+        self.chunk = enclosing
+
+        self.chunk.emit(OpCode.MAKE_FUNCTION, function)
+        self.define(stmt.name.lexeme, stmt.slot)
+
+    def visit_parallel_expr(self, expr):
+        self.expression(expr.iterable)
+        if expr.workers != None:
+            self.expression(expr.workers)
+        else:
+            self.chunk.emit(OpCode.CONST, None)
+
+        # The body is compiled like a function taking the item
+        enclosing = self.chunk
+        self.chunk = CodeObject("for each", [expr.name.lexeme], expr.size)
+        self.block(expr.body)
+        self.chunk.emit(OpCode.CONST, None)
+        self.chunk.emit(OpCode.RETURN)
+        body = self.chunk
+        self.chunk = enclosing
+
+        self.chunk.emit(OpCode.PARALLEL, (body, expr.mode, expr.keyword))
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value != None:
+            self.expression(stmt.value)
+        else:
+            self.chunk.emit(OpCode.CONST, None)
+        self.chunk.emit(OpCode.RETURN)
+
+    def visit_use_stmt(self, stmt):
+        self.chunk.emit(OpCode.USE, stmt.module_name)
+
+    def visit_flush_stmt(self, stmt):
+        self.chunk.emit(OpCode.FLUSH)
+
+    def visit_speak_stmt(self, stmt):
+        self.expression(stmt.expression)
+        self.chunk.emit(OpCode.SPEAK)
+
+    def visit_ask_stmt(self, stmt):
+        self.expression(stmt.expression)
+        self.chunk.emit(OpCode.ASK)
+
+    def visit_draw_stmt(self, stmt):
+        self.expression(stmt.command)
+        for argument in stmt.arguments:
+            self.expression(argument)
+        self.chunk.emit(OpCode.DRAW, len(stmt.arguments))
+
+    # --- Expressions ---
+
+    def visit_literal_expr(self, expr):
+        self.chunk.emit(OpCode.CONST, expr.value)
+
+    def visit_grouping_expr(self, expr):
+        self.expression(expr.expression)
+
+    def visit_variable_expr(self, expr):
+        if expr.depth is None:
+            self.chunk.emit(OpCode.GET_GLOBAL, expr.name.lexeme)
+        elif expr.depth == 0:
+            self.chunk.emit(OpCode.GET_LOCAL, expr.slot)
+        else:
+            self.chunk.emit(OpCode.GET_OUTER, (expr.depth, expr.slot))
+
+    def visit_assign_expr(self, expr):
+        if expr.appends is not None and (expr.depth is None or expr.depth == 0):
+            # update s to s plus a plus b: s, then the pieces (see Resolver.appends)
+            self.expression(expr.appends[0].left)
+            for binary in expr.appends:
+                self.expression(binary.right)
+            operators = tuple(binary.operator for binary in expr.appends)
+            if expr.depth is None:
+                self.chunk.emit(OpCode.APPEND_GLOBAL, (expr.name.lexeme, operators))
+            else:
+                self.chunk.emit(OpCode.APPEND_LOCAL, (expr.slot, operators))
+            return
+
+        self.expression(expr.value)
+        if expr.depth is None:
+            self.chunk.emit(OpCode.SET_GLOBAL, expr.name.lexeme)
+        elif expr.depth == 0:
+            self.chunk.emit(OpCode.SET_LOCAL, expr.slot)
+        else:
+            self.chunk.emit(OpCode.SET_OUTER, (expr.depth, expr.slot))
+
+    def visit_unary_expr(self, expr):
+        self.expression(expr.right)
+        op = UNARY_OPS.get(expr.operator.type)
+        if op is None:
+            # Unknown unary operators evaluate to nothing, like the tree-walker
+            self.chunk.emit(OpCode.POP)
+            self.chunk.emit(OpCode.CONST, None)
+            return
+        self.chunk.emit(op, expr.operator)
+
+    def visit_binary_expr(self, expr):
+        self.expression(expr.left)
+        self.expression(expr.right)
+        op = BINARY_OPS.get(expr.operator.type)
+        if op is None:
+            self.chunk.emit(OpCode.POP)
+            self.chunk.emit(OpCode.POP)
+            self.chunk.emit(OpCode.CONST, None)
+            return
+        self.chunk.emit(op, expr.operator)
+
+    def visit_logical_expr(self, expr):
+        self.expression(expr.left)
+        if expr.operator.type == TokenType.OR:
+            end_jump = self.chunk.emit(OpCode.JUMP_IF_TRUE_OR_POP)
+        else:
+            end_jump = self.chunk.emit(OpCode.JUMP_IF_FALSE_OR_POP)
+        self.expression(expr.right)
+        self.chunk.patch(end_jump, self.chunk.here())
+
+    def visit_call_expr(self, expr):
+        self.expression(expr.callee)
+        for argument in expr.arguments:
+            self.expression(argument)
+        self.chunk.emit(OpCode.CALL, (len(expr.arguments), expr.paren))
+
+    def visit_call_over_expr(self, expr):
+        self.expression(expr.callee)
+        self.expression(expr.iterable)
+        self.chunk.emit(OpCode.CALL_OVER, expr.paren)
+
+    def visit_list_expr(self, expr):
+        for element in expr.elements:
+            self.expression(element)
+        self.chunk.emit(OpCode.BUILD_LIST, len(expr.elements))
+
+    def visit_map_expr(self, expr):
+        for key, value in zip(expr.keys, expr.values):
+            self.expression(key)
+            self.expression(value)
+        self.chunk.emit(OpCode.BUILD_MAP, (len(expr.keys), expr.brace))
+
+    def visit_index_expr(self, expr):
+        self.expression(expr.object)
+        self.expression(expr.index)
+        self.chunk.emit(OpCode.GET_INDEX, expr.bracket)
+
+    def visit_set_index_expr(self, expr):
+        self.expression(expr.object)
+        self.expression(expr.index)
+        self.expression(expr.value)
+        self.chunk.emit(OpCode.SET_INDEX, expr.bracket)
+
+    def visit_python_access_expr(self, expr):
+        self.chunk.emit(OpCode.PYTHON_ACCESS, (tuple(expr.property_chain), expr.depth, expr.slot, expr.cache))
@@ -7,25 +7,46 @@ class Environment:
         self.values[name] = value
 
     def get(self, name):
-        key = name
-        if hasattr(name, 'lexeme'):
-            key = name.lexeme
-            
-        if key in self.values:
-            return self.values[key]
-        
+        if name in self.values:
+            return self.values[name]
+
         if self.enclosing:
             return self.enclosing.get(name)
 
-        raise RuntimeError(f"Undefined variable '{key}'.")
+        raise RuntimeError(f"Undefined variable '{name}'.")
 
     def assign(self, name, value):
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
+        if name in self.values:
+            self.values[name] = value
             return
 
         if self.enclosing:
             self.enclosing.assign(name, value)
             return
 
-        raise RuntimeError(f"Undefined variable '{name.lexeme}'.")
+        raise RuntimeError(f"Undefined variable '{name}'.")
+
+class Frame:
+    """
+    Locals of one function call (or of the top level script's blocks).
+    Every block inside the function shares the frame, so it is allocated
+    once per call with one slot per param/local (see Resolver).
+    'enclosing' is the frame the function was defined in (its closure).
+    """
+    __slots__ = ('slots', 'enclosing')
+
+    def __init__(self, size, enclosing=None):
+        self.slots = [None] * size
+        self.enclosing = enclosing
+
+    def ancestor(self, depth):
+        frame = self
+        for _ in range(depth):
+            frame = frame.enclosing
+        return frame
+
+    def get_at(self, depth, slot):
+        return self.ancestor(depth).slots[slot]
+
+    def assign_at(self, depth, slot, value):
+        self.ancestor(depth).slots[slot] = value
@@ -0,0 +1,118 @@
+import mmap
+import atexit
+import weakref
+from values import RuntimeError, Bytes, stringify
+from output import Output
+
+# Natives for reading and writing files without loading them whole:
+#
+#   for each line in call read_lines with "huge.log" do   # One line at a time
+#       ...
+#   end
+#   set data to call map_file with "huge.bin"   # Bytes, paged in as they are used
+#   set out to call write_file with "report.txt"
+#   call write with out, "total: " plus total     # Buffered, a line per write
+#   call close with out
+
+READ_BUFFER = 1024 * 1024 # Bytes read from disk at a time by read_lines
+
+def map_file(path):
+    # 'map_file': the whole file as Bytes, memory-mapped (so slice and find
+    # work on it in place, and only the pages touched are ever read)
+    with open_file(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return Bytes.of(b"") # An empty file can't be mapped
+        except OSError as e:
+            raise RuntimeError(None, f"File Error: {e}")
+    return Bytes.of(data) # The map stays open for as long as the Bytes are used
+
+class Lines:
+    """ read_lines: a file's lines (without their line breaks), read as they are looped over. """
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        # Opened here rather than in the generator, so a missing file is reported by 'for each'
+        file = open_file(self.path, 'r', encoding='utf-8', errors='replace', buffering=READ_BUFFER)
+        return strip_lines(file)
+
+    def __str__(self):
+        return f"<lines of {self.path}>"
+
+def strip_lines(file):
+    with file:
+        for line in file:
+            yield line[:-1] if line.endswith("\n") else line
+
+def read_lines(path):
+    open_file(path, 'rb').close() # Fail at the call if it can't be read
+    return Lines(path)
+
+# --- Writing ---
+
+class FileWriter(Output):
+    """ write_file: an output file, filled a line at a time through Output's buffer. """
+    def __init__(self, path, file):
+        super().__init__(file, interactive=False)
+        self.path = path
+
+    def close(self):
+        if not self.stream.closed:
+            self.flush()
+            self.stream.close()
+
+    __del__ = close
+
+    def __str__(self):
+        return f"<file {self.path}>"
+
+# Writers not closed by the program are closed (and so flushed) when it ends
+_writers = weakref.WeakSet()
+
+@atexit.register
+def close_all():
+    for writer in list(_writers):
+        writer.close()
+
+def write_file(path, mode="new"):
+    # mode "new" replaces the file, "append" adds to its end
+    if mode not in ("new", "append"):
+        raise RuntimeError(None, "A file is written 'new' or 'append'.")
+    writer = FileWriter(path, open_file(path, 'w' if mode == "new" else 'a', encoding='utf-8'))
+    _writers.add(writer)
+    return writer
+
+def write(writer, value):
+    # 'write': value as a line, like 'say' does
+    if not isinstance(writer, FileWriter):
+        raise RuntimeError(None, "Can only write to a file from write_file.")
+    if writer.stream.closed:
+        raise RuntimeError(None, f"The file '{writer.path}' is already closed.")
+    if isinstance(value, Bytes):
+        raise RuntimeError(None, "Decode bytes before writing them as text.")
+    writer.line(stringify(value))
+
+def close(writer):
+    if not isinstance(writer, FileWriter):
+        raise RuntimeError(None, "Can only close a file from write_file.")
+    writer.close()
+
+def open_file(path, mode, **options):
+    if not isinstance(path, str):
+        raise RuntimeError(None, "A file name must be text.")
+    try:
+        return open(path, mode, **options)
+    except FileNotFoundError:
+        raise RuntimeError(None, f"I couldn't find the file '{path}'.")
+    except OSError as e:
+        raise RuntimeError(None, f"File Error: {e}")
+
+NATIVES = {
+    "map_file": map_file,
+    "read_lines": read_lines,
+    "write_file": write_file,
+    "write": write,
+    "close": close,
+}
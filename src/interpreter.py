@@ -1,79 +1,128 @@
+from enum import Enum, auto
 from tokens import TokenType
 from ast_nodes import *
-from environment import Environment
-import time
-import importlib
-
-class ReturnException(Exception):
-    def __init__(self, value):
-        self.value = value
-
-class RuntimeError(Exception):
-    def __init__(self, token, message):
-        super().__init__(message)
-        self.token = token
+from environment import Environment, Frame
+from values import RuntimeError, Bytes, List, Map, is_number, is_truthy, stringify
+from operators import append_text, add_all
+from lists import NATIVES as LIST_NATIVES, get_index, set_index, iterate
+from buffers import NATIVES as BUFFER_NATIVES
+from files import NATIVES as FILE_NATIVES
+from output import Output
+import bridge
+import sys
+from types import FunctionType
+# Optional subsystems (the AI engine, the Python bridge, voice, turtle) are
+# imported by the statements that use them, so scripts that never 'ask' or
+# 'use' anything don't pay for urllib/http/importlib at startup.
+
+class Completion(Enum):
+    """
+    How a statement finished when it didn't simply run to its end.
+    Statements return None normally, or one of these, which every enclosing
+    block/loop passes outwards until something handles it - no exceptions.
+    """
+    RETURN = auto()   # The value is in Interpreter.return_value
 
 class GenesisFunction:
-    def __init__(self, declaration):
+    def __init__(self, declaration, closure, name=None):
         self.declaration = declaration
+        self.closure = closure # The frame the function was defined in
+        # For call counts, the profiler and printing ("for each" for a parallel loop's body, as in the VM)
+        self.name = name or declaration.name.lexeme
 
     def call(self, interpreter, arguments):
-        environment = Environment(interpreter.environment) # Closure? No, globals for now + dynamic scope issues? 
-        # Actually proper closures require capturing closure at definition time.
-        # For simplicity v1: just new env with global parent? No, scope is static.
-        # "environment" param in interpret() creates local scope.
-        # But we need closure support for 'global' variables to work?
-        # Let's assume global scope is available via chain.
-        # We need to capture the environment where function was defined? 
-        # Let's stick to dynamic for MVP or use the interpreter's 'globals' if we track them.
-        # BETTER: The interpreter passes its current environment, but really we should capture 'closure'
-        
-        for i in range(len(self.declaration.params)):
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
-            
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnException as returnValue:
-            return returnValue.value
+        # Lexical scope: the call's frame chains onto the defining frame,
+        # not the caller's. Params take the first slots (see Resolver).
+        frame = Frame(self.declaration.size, self.closure)
+        frame.slots[0:len(arguments)] = arguments
+        if interpreter.call_counts is not None:
+            interpreter.call_counts[self.name] += 1
+
+        if interpreter.execute_block(self.declaration.body, frame) is Completion.RETURN:
+            value = interpreter.return_value
+            interpreter.return_value = None
+            return value
         return None
 
     def arity(self):
         return len(self.declaration.params)
 
     def __str__(self):
-        return f"<fn {self.declaration.name.lexeme}>"    
+        return f"<fn {self.name}>"    
+
+# Python functions every program has. They don't print, so calling them needn't
+# flush, and they take Genesis values as they are (Bytes too).
+NATIVES = {**LIST_NATIVES, **BUFFER_NATIVES, **FILE_NATIVES}
+NATIVE_FUNCTIONS = frozenset(NATIVES.values())
 
 class Interpreter:
-    def __init__(self):
-        self.environment = Environment()
+    def __init__(self, output=None):
+        self.output = output if output is not None else Output() # Where 'say' goes (see output.py)
+        self.globals = Environment()
+        self.globals.values.update(NATIVES) # length, sum, slice, read_lines, ... (lists.py, buffers.py, files.py)
+        self.frame = Frame(0) # Locals of the running function (or top level blocks)
+        self.return_value = None # Carried by Completion.RETURN
         self.python_modules = {} # Store imported python modules
+        self.had_error = False # A runtime error stopped a program
+        self.pending_answers = [] # Futures of 'ask' answers not printed yet, in order
+        self.call_counts = None # Calls per Genesis function name, a Counter while profiling (see profiler.py)
 
-    def interpret(self, statements):
+    def interpret(self, statements, frame_size=0):
+        # frame_size: slots for top level block locals (Resolver.frame_size)
+        self.frame = Frame(frame_size)
         try:
             for statement in statements:
-                if statement:
-                    self.execute(statement)
+                # A 'return' at the top level just ends the script
+                if statement and self.execute(statement) is Completion.RETURN:
+                    break
         except RuntimeError as error:
-            line_info = f"[line {error.token.line}]" if error.token else ""
-            print(f"{error}\n{line_info}")
+            self.runtime_error(error)
+        finally:
+            self.print_answers()
+            self.output.flush()
+
+    def runtime_error(self, error):
+        self.print_answers()
+        self.output.flush() # What the program said comes before the error
+        line_info = f"[line {error.token.line}]" if error.token else ""
+        print(f"{error}\n{line_info}")
+        self.had_error = True
+
+    def spawn(self):
+        """ A fresh engine sharing this one's globals and Python modules, to run code on another thread. """
+        # Its output is captured and printed by whoever spawned it: no need to go line by line
+        worker = type(self)(Output(interactive=False))
+        worker.globals = self.globals
+        worker.python_modules = self.python_modules
+        worker.call_counts = self.call_counts
+        return worker
+
+    def call_function(self, function, arguments):
+        """ Calls a Genesis function from outside a running program (see parallel.py). """
+        try:
+            return function.call(self, arguments)
+        finally:
+            self.print_answers()
+            self.output.flush()
 
     def execute(self, stmt):
-        stmt.accept(self)
+        return stmt.accept(self)
 
     def evaluate(self, expr):
         return expr.accept(self)
     
 
     def visit_function_stmt(self, stmt):
-        function = GenesisFunction(stmt)
+        function = GenesisFunction(stmt, self.frame)
         # We define it in the current environment
-        self.environment.define(stmt.name.lexeme, function)
+        self.define(stmt.name.lexeme, stmt.slot, function)
 
     def visit_return_stmt(self, stmt):
         value = None
         if stmt.value != None:
             value = self.evaluate(stmt.value)
-        raise ReturnException(value)
+        self.return_value = value
+        return Completion.RETURN
 
     def visit_call_expr(self, expr):
         callee = self.evaluate(expr.callee)
@@ -87,20 +136,56 @@ class Interpreter:
             if len(arguments) != function.arity():
                 raise RuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
             return function.call(self, arguments)
-        
-        elif callable(callee):
-            # It's a Python function!
+
+        return self.call_python(expr.paren, callee, arguments)
+
+    def call_python(self, paren, callee, arguments):
+        if callable(callee):
+            arguments = self.before_python(callee, arguments)
             try:
-                return callee(*arguments)
+                # bytes come back without a copy
+                result = callee(*arguments)
+                return Bytes.of(result) if type(result) is bytes else result
+            except RuntimeError as e:
+                # From a native function (lists.py): point at the call
+                if e.token is None: e.token = paren
+                raise
             except Exception as e:
-                raise RuntimeError(expr.paren, f"Python Error: {e}")
+                raise RuntimeError(paren, f"Python Error: {e}")
         else:
-             raise RuntimeError(expr.paren, "Can only call functions.")
+             raise RuntimeError(paren, "Can only call functions.")
+
+    def before_python(self, callee, arguments=()):
+        """
+        Readies a call into Python; returns the arguments to call it with.
+        Natives take Genesis values as they are. Anything else may print, so
+        earlier output goes first, and Bytes go in as the memory itself.
+        """
+        if type(callee) is FunctionType and callee in NATIVE_FUNCTIONS:
+            return arguments
+        if self.pending_answers or self.output.pieces: self.flush()
+        if Bytes in map(type, arguments):
+            arguments = [argument.python() if type(argument) is Bytes else argument for argument in arguments]
+        return arguments
+
+    def visit_call_over_expr(self, expr):
+        callee = self.evaluate(expr.callee)
+        return self.call_over(expr.paren, callee, self.evaluate(expr.iterable))
+
+    def call_over(self, paren, callee, items):
+        if not callable(callee):
+            raise RuntimeError(paren, "Only Python functions can be called over a list ('for each' works for the others).")
+        self.before_python(callee)
+        return bridge.call_over(paren, callee, items)
 
 
     def visit_use_stmt(self, stmt):
+        self.use_module(stmt.module_name)
+
+    def use_module(self, module_name):
+        import importlib
         try:
-            module = importlib.import_module(stmt.module_name)
+            module = importlib.import_module(module_name)
             # We define the module in the environment so lookup works
             # We use the module name as the variable name (e.g. "math")
             # But wait, logic might need to strip quotes if parser kept them? 
@@ -112,27 +197,35 @@ class Interpreter:
             # Genesis user: use python "math". -> math.pi
             # Genesis user: use python "os". -> os.system
             
-            name = stmt.module_name.split('.')[-1] # Simple default
+            name = module_name.split('.')[-1] # Simple default
             # Actually, to make 'python math.pi' work, we need 'math' in our python_modules dict or environment.
             # My parser returns PythonAccess with chain starting with "math".
             # So I should store it in a special dictionary in Interpreter?
             self.python_modules[name] = module
+            bridge.invalidate() # Chains cached before may now mean something else
             
         except ImportError as e:
-            raise RuntimeError(None, f"Could not import python module '{stmt.module_name}': {e}")
+            raise RuntimeError(None, f"Could not import python module '{module_name}': {e}")
 
     def visit_python_access_expr(self, expr):
-        # expr.property_chain is ['math', 'pi'] or ['resp', 'code']
-        base_name = expr.property_chain[0]
-        
-        obj = None
-        
-        # 1. Check if it is a variable in the environment (e.g. 'resp' from 'set resp to ...')
-        try:
-            obj = self.environment.get(base_name)
-        except Exception:
-            # Not a variable, proceed to check modules
-            pass
+        # 1. Check if it is a variable (e.g. 'resp' from 'set resp to ...')
+        if expr.depth is not None:
+            obj = self.frame.get_at(expr.depth, expr.slot)
+        else:
+            obj = self.globals.values.get(expr.property_chain[0])
+            if obj is None:
+                obj = self.python_modules.get(expr.property_chain[0])
+        # Inline cache hit: the same base as last time, nothing 'use'd since
+        entry = expr.cache.entry
+        if entry[0] is obj and entry[1] == bridge.generation:
+            bridge.hits += 1
+            return entry[2]
+        return self.python_access(expr.property_chain, obj, expr.cache)
+
+    def python_access(self, property_chain, obj, cache):
+        # property_chain is ['math', 'pi'] or ['resp', 'code']
+        # obj is the value of the variable named like the base, if there is one
+        base_name = property_chain[0]
             
         # 2. If not a variable, check explicit imported modules (e.g. 'math')
         if obj is None:
@@ -141,122 +234,240 @@ class Interpreter:
             else:
                  raise RuntimeError(None, f"Name '{base_name}' is not a defined variable or loaded python module.")
         
-        # 3. Traverse the chain
-        for prop in expr.property_chain[1:]:
-            try:
-                obj = getattr(obj, prop)
-            except AttributeError:
-                raise RuntimeError(None, f"Object '{base_name}' has no attribute '{prop}'.")
-            
-        return obj
+        # 3. Traverse the chain (or take what it resolved to last time, see bridge.py)
+        obj = bridge.resolve(cache, property_chain, obj)
+        return Bytes.of(obj) if type(obj) is bytes else obj
 
 
     def visit_block_stmt(self, stmt):
-        self.execute_block(stmt.statements, Environment(self.environment))
+        # Block locals live in the current frame (see Resolver), so there
+        # is no new scope to set up.
+        return self.execute_statements(stmt.statements)
 
-    def execute_block(self, statements, environment):
-        previous = self.environment
+    def execute_block(self, statements, frame):
+        previous = self.frame
         try:
-            self.environment = environment
-            for statement in statements:
-                self.execute(statement)
+            self.frame = frame
+            return self.execute_statements(statements)
         finally:
-            self.environment = previous
+            self.frame = previous
+
+    def execute_statements(self, statements):
+        for statement in statements:
+            # A parse error leaves a None in the block; skip it like interpret() does.
+            if statement:
+                completion = statement.accept(self)
+                if completion is not None:
+                    return completion
+        return None
 
     def visit_expression_stmt(self, stmt):
         self.evaluate(stmt.expression)
 
     def visit_print_stmt(self, stmt):
         value = self.evaluate(stmt.expression)
-        print(self.stringify(value))
+        if self.pending_answers: self.print_answers()
+        self.output.line(self.stringify(value))
+
+    def visit_flush_stmt(self, stmt):
+        self.flush()
+
+    def flush(self):
+        self.print_answers()
+        self.output.flush()
 
     def visit_var_stmt(self, stmt):
         value = None
         if stmt.initializer != None:
             value = self.evaluate(stmt.initializer)
         
-        self.environment.define(stmt.name.lexeme, value)
+        self.define(stmt.name.lexeme, stmt.slot, value)
+
+    def define(self, name, slot, value):
+        if slot is None:
+            self.globals.define(name, value)
+        else:
+            self.frame.slots[slot] = value
 
     def visit_if_stmt(self, stmt):
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch != None:
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
 
     def visit_while_stmt(self, stmt):
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
+
+    def visit_times_stmt(self, stmt):
+        count = self.evaluate(stmt.count)
+        for _ in range(self.repeat_count(count)):
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
+
+    def visit_for_each_stmt(self, stmt):
+        slots = self.frame.slots
+        for item in self.iterate(stmt.keyword, self.evaluate(stmt.iterable)):
+            slots[stmt.slot] = item
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
+
+    def iterate(self, keyword, value):
+        return iterate(keyword, value)
+
+    def repeat_count(self, count):
+        if not is_number(count):
+            raise RuntimeError(None, "Repeat count must be a number.")
+        return max(0, int(count))
+
+    # --- v5: AI, Voice, Graphics ---
+
+    def visit_speak_stmt(self, stmt):
+        self.speak(self.evaluate(stmt.expression))
+
+    def visit_ask_stmt(self, stmt):
+        self.ask(self.evaluate(stmt.expression))
+
+    def visit_draw_stmt(self, stmt):
+        command = self.evaluate(stmt.command)
+        arguments = [self.evaluate(argument) for argument in stmt.arguments]
+        self.draw(command, arguments)
+
+    def speak(self, value):
+        text = self.stringify(value)
+        self.print_answers()
+        self.output.line(f"🗣️  {text}")
+        # Native voice is only available on macOS ('say' command)
+        if sys.platform == "darwin":
+            self.output.flush() # Show the line while it is spoken
+            import subprocess
+            subprocess.run(["say", text])
+
+    def ask(self, value):
+        # Don't wait for the answer: further questions can be on their way
+        # while it is, and it is printed when the next output is due.
+        import ai_engine
+        self.pending_answers.append(ai_engine.ask_async(self.stringify(value)))
+
+    def print_answers(self):
+        # Answers are printed in the order they were asked, before any later output
+        pending, self.pending_answers = self.pending_answers, []
+        for answer in pending:
+            self.output.line(answer.result())
+
+    def draw(self, command, arguments):
+        # draw "circle" with 100 -> turtle.circle(100)
+        self.flush()
+        import turtle
+        name = self.stringify(command)
+        action = getattr(turtle, name, None)
+        if not callable(action):
+            raise RuntimeError(None, f"I don't know how to draw '{name}'.")
+        try:
+            action(*arguments)
+        except Exception as e:
+            raise RuntimeError(None, f"Graphics Error: {e}")
+
+    def visit_parallel_expr(self, expr):
+        items = self.evaluate(expr.iterable)
+        workers = self.evaluate(expr.workers) if expr.workers else None
+        return self.run_parallel(expr.keyword, GenesisFunction(expr, self.frame, "for each"), items, workers, expr.mode)
+
+    def run_parallel(self, keyword, function, items, workers, mode):
+        import parallel
+        try:
+            items = list(items)
+        except TypeError:
+            raise RuntimeError(keyword, "Can only loop over a list.")
+        if workers is not None:
+            if not is_number(workers) or workers < 1:
+                raise RuntimeError(keyword, "Workers must be a number of at least 1.")
+            workers = int(workers)
+        # Flushed before any worker starts (forked ones would inherit the buffer)
+        self.flush()
+
+        results = parallel.run_iterations(self, keyword, function, items, workers, mode == "processes")
+
+        # Everything comes out in list order, as if the loop had run one item at a time
+        values = List()
+        for value, output, error in results:
+            self.output.write(output)
+            if error is not None:
+                raise error
+            values.append(value)
+        return values
 
     def visit_assign_expr(self, expr):
+        if expr.appends is not None:
+            return self.append_assign(expr)
         value = self.evaluate(expr.value)
-        self.environment.assign(expr.name, value)
+        self.assign(expr, value)
         return value
 
+    def append_assign(self, expr):
+        # update s to s plus a plus b (see Resolver.appends)
+        text = self.evaluate(expr.appends[0].left)
+        pieces = [self.evaluate(binary.right) for binary in expr.appends]
+        if type(text) is str:
+            # With the variable let go of, 'text' is the string's only
+            # reference and += can grow it in place rather than copy it
+            self.assign(expr, None)
+            text += append_text(pieces)
+        else:
+            text = add_all([binary.operator for binary in expr.appends], text, pieces)
+        self.assign(expr, text)
+        return text
+
+    def assign(self, expr, value):
+        if expr.depth is None:
+            self.globals.assign(expr.name.lexeme, value)
+        else:
+            self.frame.assign_at(expr.depth, expr.slot, value)
+
     def visit_variable_expr(self, expr):
-        return self.environment.get(expr.name)
+        if expr.depth == 0:
+            return self.frame.slots[expr.slot]
+        if expr.depth is None:
+            return self.globals.get(expr.name.lexeme)
+        return self.frame.get_at(expr.depth, expr.slot)
 
     def visit_literal_expr(self, expr):
         return expr.value
 
+    def visit_list_expr(self, expr):
+        return List([self.evaluate(element) for element in expr.elements])
+
+    def visit_map_expr(self, expr):
+        map = Map()
+        for key, value in zip(expr.keys, expr.values):
+            set_index(expr.brace, map, self.evaluate(key), self.evaluate(value))
+        return map
+
+    def visit_index_expr(self, expr):
+        object = self.evaluate(expr.object)
+        return get_index(expr.bracket, object, self.evaluate(expr.index))
+
+    def visit_set_index_expr(self, expr):
+        object = self.evaluate(expr.object)
+        index = self.evaluate(expr.index)
+        return set_index(expr.bracket, object, index, self.evaluate(expr.value))
+
     def visit_grouping_expr(self, expr):
         return self.evaluate(expr.expression)
 
     def visit_unary_expr(self, expr):
         right = self.evaluate(expr.right)
-
-        if expr.operator.type == TokenType.MINUS:
-            self.check_number_operand(expr.operator, right)
-            return -float(right)
-        if expr.operator.type == TokenType.NOT:
-            return not self.is_truthy(right)
-
-        return None
+        # expr.operation was picked by the Resolver (see operators.py)
+        return expr.operation(expr.operator, right)
 
     def visit_binary_expr(self, expr):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
-
-        if expr.operator.type == TokenType.MINUS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        
-        if expr.operator.type == TokenType.OVER:
-            self.check_number_operands(expr.operator, left, right)
-            if float(right) == 0:
-                raise RuntimeError(expr.operator, "Division by zero.")
-            return float(left) / float(right)
-            
-        if expr.operator.type == TokenType.TIMES:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
-            
-        if expr.operator.type == TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
-            if isinstance(left, str) and isinstance(right, str):
-                return str(left) + str(right)
-            if isinstance(left, str):
-                return left + self.stringify(right)
-            if isinstance(right, str):
-                return self.stringify(left) + right
-            raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
-        
-        if expr.operator.type == TokenType.GREATER:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        if expr.operator.type == TokenType.LESS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        
-        # 'is' (EQUAL)
-        if expr.operator.type == TokenType.IS:
-            return self.is_equal(left, right)
-            
-        # 'is not' (NOT)
-        if expr.operator.type == TokenType.NOT:
-            return not self.is_equal(left, right)
-
-        return None
+        return expr.operation(expr.operator, left, right)
     
     def visit_logical_expr(self, expr):
         left = self.evaluate(expr.left)
@@ -268,31 +479,10 @@ class Interpreter:
         
         return self.evaluate(expr.right)
 
-    def check_number_operand(self, operator, operand):
-        if isinstance(operand, float): return
-        raise RuntimeError(operator, "Operand must be a number.")
-
-    def check_number_operands(self, operator, left, right):
-        if isinstance(left, float) and isinstance(right, float): return
-        raise RuntimeError(operator, "Operands must be numbers.")
+    # Value helpers (see values.py)
 
     def is_truthy(self, object):
-        if object is None: return False
-        if isinstance(object, bool): return bool(object)
-        return True
-
-    def is_equal(self, a, b):
-        if a is None and b is None: return True
-        if a is None: return False
-        return a == b
+        return is_truthy(object)
 
     def stringify(self, object):
-        if object is None: return "nothing"
-        if isinstance(object, float):
-            text = str(object)
-            if text.endswith(".0"):
-                text = text[0:len(text)-2]
-            return text
-        if isinstance(object, bool):
-            return "true" if object else "false"
-        return str(object)
+        return stringify(object)
@@ -1,17 +1,25 @@
 import sys
 import os
+import time
+import argparse
 from lexer import Lexer
 from parser import Parser, ParseError
+from resolver import Resolver
+from optimizer import Optimizer
+from ast_printer import AstPrinter
+import cache
 from interpreter import Interpreter
+from vm import VM
+import bridge
+from output import Output
 
-# Intellisense (Autocomplete)
-try:
-    from prompt_toolkit import PromptSession
-    from prompt_toolkit.completion import WordCompleter
-    from prompt_toolkit.styles import Style
-    HAS_PROMPT_TOOLKIT = True
-except ImportError:
-    HAS_PROMPT_TOOLKIT = False
+# Execution engines: the bytecode VM is the default, the original
+# tree-walking Interpreter is still available with --engine tree.
+ENGINES = {
+    "vm": VM,
+    "tree": Interpreter,
+}
+DEFAULT_ENGINE = "vm"
 
 GENESIS_KEYWORDS = [
     'say', 'set', 'check', 'loop', 'while', 'is', 'less', 'greater', 'than', 
@@ -19,62 +27,169 @@ GENESIS_KEYWORDS = [
     'to', 'with', 'end', 'otherwise', 'please', 'just', 'basically', 'examples', 'exit',
     'update', 'return', 'use', 'then', 'now',
     # v5
-    'speak', 'draw', 'ask', 'if'
+    'speak', 'draw', 'ask', 'if',
+    # v6
+    'for', 'each', 'parallel', 'flush'
 ]
 
-COMPLETER = WordCompleter(GENESIS_KEYWORDS, ignore_case=True) if HAS_PROMPT_TOOLKIT else None
+def make_prompt_session():
+    """
+    Intellisense (Autocomplete) for the REPL, or None in basic mode.
+    prompt_toolkit is only imported here: running a script never loads it.
+    """
+    try:
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.completion import WordCompleter
+        from prompt_toolkit.styles import Style
+    except ImportError:
+        return None
 
-def run(source, interpreter, repl_mode=False):
-    lexer = Lexer(source)
-    tokens = lexer.scan_tokens()
+    style = Style.from_dict({
+        'completion-menu.completion': 'bg:#008888 #ffffff',
+        'completion-menu.completion.current': 'bg:#00aaaa #000000',
+        'scrollbar.background': 'bg:#88aaaa',
+        'scrollbar.button': 'bg:#222222',
+    })
+    completer = WordCompleter(GENESIS_KEYWORDS, ignore_case=True)
+    return PromptSession(completer=completer, style=style)
 
-    # For now, just print tokens if we want debug
-    # for token in tokens: print(token)
+def compile_source(source, optimize=True, dump_ast=False):
+    """
+    Lex, parse, optimize and resolve a program, given as text or as an
+    open file (lexed as it is read).
+    Returns (statements, frame_size, had_error), ready for interpret().
+    """
+    lexer = Lexer(source)
 
-    parser = Parser(tokens)
+    # The parser pulls tokens from the lexer as it goes: no full token list.
+    # For now, just print tokens if we want debug: print(lexer.scan_tokens())
+    parser = Parser(lexer.scan())
     
     # In REPL, we might want to accept expressions dynamically, but our parser expects a list of declarations.
     # For simplicity, we just look for statements.
     statements = parser.parse()
 
     # Stop if there was a syntax error.
-    if statements is None: return
+    if statements is None: return None
+
+    if dump_ast:
+        print("== AST ==")
+        AstPrinter().print(statements)
+
+    # Fold constants and drop dead branches (before resolving, so pruned code gets no slots)
+    if optimize:
+        statements = Optimizer().optimize(statements)
+        if dump_ast:
+            print("== Optimized AST ==")
+            AstPrinter().print(statements)
+
+    # Work out where every variable lives before running anything.
+    resolver = Resolver()
+    resolver.resolve(statements)
+    if resolver.had_error: return None
+
+    return statements, resolver.frame_size, lexer.had_error or parser.had_error
 
-    interpreter.interpret(statements)
+def run(source, interpreter, repl_mode=False, optimize=True, dump_ast=False):
+    program = compile_source(source, optimize, dump_ast)
+    if program is None: return
 
-def run_file(path):
+    statements, frame_size, had_error = program
+    interpreter.interpret(statements, frame_size)
+
+def load_program(path, source, optimize=True, dump_ast=False):
+    """ The compiled program for a script file, from __genesiscache__ when possible. """
+    # --dump-ast wants to see the trees being built, so it always compiles
+    if not dump_ast:
+        program = cache.load(path, source, optimize)
+        if program is not None:
+            statements, frame_size = program
+            return statements, frame_size, False
+
+    program = compile_source(source, optimize, dump_ast)
+    if program is None: return None
+
+    statements, frame_size, had_error = program
+    # Scripts with errors are never cached, so their messages show up on every run
+    if not had_error:
+        cache.store(path, source, optimize, statements, frame_size)
+    return program
+
+def run_file(path, engine=DEFAULT_ENGINE, optimize=True, dump_ast=False, use_cache=True, output_path=None, profile=False):
+    """
+    Runs a script in a fresh interpreter. Returns False if anything went wrong.
+    With output_path, what the script says goes to that file instead of stdout.
+    With profile, a report on where the time went follows (see profiler.py).
+    """
+    output_file = None
+    # A server or batch worker runs many scripts
+    bridge.reset_stats()
+    if "ai_engine" in sys.modules:
+        sys.modules["ai_engine"].reset_stats()
     try:
+        if output_path:
+            output_file = open(output_path, 'w', encoding='utf-8')
+        interpreter = ENGINES[engine](Output(output_file) if output_file else None)
         with open(path, 'r') as file:
-            source = file.read()
-        interpreter = Interpreter()
-        run(source, interpreter)
+            if use_cache:
+                program = load_program(path, file.read(), optimize, dump_ast)
+            else:
+                # No source hash needed: parse straight from the file as it is read
+                program = compile_source(file, optimize, dump_ast)
+        if program is None: return False
+
+        statements, frame_size, had_error = program
+        if profile:
+            import profiler
+            profiler.profile(path, interpreter, statements, frame_size)
+        else:
+            interpreter.interpret(statements, frame_size)
+        return not (had_error or interpreter.had_error)
 
-    except FileNotFoundError:
-        print(f"❌ Oops! I couldn't find the file '{path}'.")
+    except FileNotFoundError as e:
+        print(f"❌ Oops! I couldn't find the file '{e.filename or path}'.")
     except Exception as e:
         print(f"❌ System Error: {e}")
+    finally:
+        if output_file:
+            output_file.close()
+    return False
+
+def precompile(directory, optimize=True):
+    """ Fill __genesiscache__ for every .gen file under a directory ahead of time. """
+    compiled = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != cache.CACHE_DIR]
+        for filename in sorted(files):
+            if not filename.endswith(".gen"): continue
+            path = os.path.join(root, filename)
+            with open(path, 'r') as file:
+                source = file.read()
 
-def run_prompt():
-    interpreter = Interpreter()
+            program = compile_source(source, optimize)
+            if program is None or program[2]:
+                print(f"⚠️  Skipped {path} (has errors)")
+                continue
+            statements, frame_size, had_error = program
+            if cache.store(path, source, optimize, statements, frame_size):
+                compiled += 1
+                print(f"✅ Compiled {path}")
+            else:
+                print(f"⚠️  Could not write cache for {path}")
+    print(f"{compiled} script(s) compiled.")
+
+def run_prompt(engine=DEFAULT_ENGINE, **options):
+    interpreter = ENGINES[engine]()
+    session = make_prompt_session()
     print("✨ Genesis Language REPL (v4.1)")
     print("   - Type 'exit' to quit.")
     print("   - Type 'examples' to see cool demos.")
-    print("   (Intellisense Enabled)" if HAS_PROMPT_TOOLKIT else "   (Basic Mode)")
-
-    session = None
-    if HAS_PROMPT_TOOLKIT:
-        style = Style.from_dict({
-            'completion-menu.completion': 'bg:#008888 #ffffff',
-            'completion-menu.completion.current': 'bg:#00aaaa #000000',
-            'scrollbar.background': 'bg:#88aaaa',
-            'scrollbar.button': 'bg:#222222',
-        })
-        session = PromptSession(completer=COMPLETER, style=style)
+    print("   (Intellisense Enabled)" if session else "   (Basic Mode)")
 
     while True:
         try:
             line = ""
-            if HAS_PROMPT_TOOLKIT:
+            if session:
                 line = session.prompt("> ")
             else:
                 line = input("> ")
@@ -101,7 +216,7 @@ def run_prompt():
                 print("\n   Which one to run? (Enter number)")
                 
                 choice = ""
-                if HAS_PROMPT_TOOLKIT and session:
+                if session:
                     choice = session.prompt("   > ")
                 else:
                     choice = input("   > ")
@@ -114,7 +229,7 @@ def run_prompt():
                         try:
                             # Create a fresh interpreter for the example to ensure clean state
                             # But wait, run_file creates a new interpreter internally.
-                            run_file(target)
+                            run_file(target, engine, **options)
                         except Exception as e:
                             print(f"❌ Script Error: {e}")
                         
@@ -124,7 +239,7 @@ def run_prompt():
                 continue
             # ---------------------
 
-            run(line, interpreter, repl_mode=True)
+            run(line, interpreter, repl_mode=True, **options)
             
         except EOFError:
             break
@@ -134,14 +249,110 @@ def run_prompt():
         except Exception as e:
              print(f"❌ Error: {e}")
 
+def startup_profile(argv, top=10):
+    """
+    Runs Genesis again under 'python -X importtime' with the same arguments
+    and reports which imports the startup time went to.
+    """
+    import subprocess
+    command = [sys.executable, "-X", "importtime", os.path.abspath(__file__)] + argv
+    start = time.perf_counter()
+    result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
+    wall_time = time.perf_counter() - start
+
+    imports = [] # (self us, cumulative us, module, nesting level)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            # The script's own error output
+            print(line, file=sys.stderr)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue # Header line
+        name = fields[2][1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        imports.append((int(fields[0]), int(fields[1]), name.strip(), level))
+
+    total = sum(self_us for self_us, _, _, _ in imports)
+    print("\n🕒 Startup Profile")
+    print(f"   Process wall time: {wall_time * 1000:8.1f} ms")
+    print(f"   Imports:           {total / 1000:8.1f} ms ({len(imports)} modules)")
+
+    print(f"\n   Top level imports (with everything they pulled in):")
+    roots = sorted((i for i in imports if i[3] == 0), key=lambda i: i[1], reverse=True)
+    for self_us, cumulative, name, level in roots[:top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    print(f"\n   Slowest modules (own time):")
+    for self_us, cumulative, name, level in sorted(imports, reverse=True)[:top]:
+        print(f"   {self_us / 1000:8.1f} ms  {name}")
+    return result.returncode
+
+def report_bridge_stats():
+    stats = bridge.stats()
+    lookups = stats["hits"] + stats["misses"]
+    sys.stderr.write(f"🐍 Python bridge: {lookups} lookups, {stats['hits']} cached ({stats['hit_rate']:.1%})\n")
+
+def report_ai_stats():
+    # ai_engine is only loaded by scripts that 'ask'
+    stats = sys.modules["ai_engine"].stats() if "ai_engine" in sys.modules else None
+    if stats is None:
+        sys.stderr.write("🧠 AI: nothing asked\n")
+        return
+    line = f"🧠 AI: {stats['requests']} sent, {stats['offline']} answered offline (cooldown)"
+    if "hits" in stats:
+        line += (f", {stats['hits']} cached of {stats['hits'] + stats['misses']} looked up ({stats['hit_rate']:.1%}"
+                 f", {stats['disk_hits']} from disk)")
+    sys.stderr.write(line + "\n")
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="genesis", description="The Genesis Programming Language")
+    arg_parser.add_argument("script", nargs="?", help="a .gen file to run (starts the REPL if omitted)")
+    arg_parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                            help="execution engine: bytecode 'vm' (default) or the 'tree' walking interpreter")
+    arg_parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                            help="skip constant folding and dead branch elimination")
+    arg_parser.add_argument("--dump-ast", action="store_true",
+                            help="print the AST before and after optimization")
+    arg_parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                            help=f"don't read or write compiled scripts in {cache.CACHE_DIR}/")
+    arg_parser.add_argument("--precompile", metavar="DIR",
+                            help=f"compile every .gen file under DIR into {cache.CACHE_DIR}/ and exit")
+    arg_parser.add_argument("--output", metavar="FILE",
+                            help="write what the script says to FILE instead of the screen")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="report time and calls per Genesis line and function, and write collapsed stacks for flame graphs")
+    arg_parser.add_argument("--bridge-stats", action="store_true",
+                            help="after the script, report how often Python bridge lookups were cached")
+    arg_parser.add_argument("--ai-stats", action="store_true",
+                            help="after the script, report AI questions sent, cached and answered offline")
+    arg_parser.add_argument("--startup-profile", action="store_true",
+                            help="run as usual, then report where import time went")
+    return arg_parser.parse_args(argv)
+
 def main():
-    if len(sys.argv) > 2:
-        print("Usage: python3 main.py [script]")
-        sys.exit(64)
-    elif len(sys.argv) == 2:
-        run_file(sys.argv[1])
+    if "--startup-profile" in sys.argv[1:]:
+        argv = [arg for arg in sys.argv[1:] if arg != "--startup-profile"]
+        sys.exit(startup_profile(argv))
+
+    args = parse_args()
+
+    if args.precompile:
+        precompile(args.precompile, args.optimize)
+        return
+
+    options = dict(optimize=args.optimize, dump_ast=args.dump_ast)
+    if args.script:
+        ok = run_file(args.script, args.engine, use_cache=args.use_cache, output_path=args.output,
+                      profile=args.profile, **options)
+        if args.bridge_stats:
+            report_bridge_stats()
+        if args.ai_stats:
+            report_ai_stats()
+        if not ok:
+            sys.exit(1)
     else:
-        run_prompt()
+        run_prompt(args.engine, **options)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,151 @@
+from tokens import TokenType
+from values import RuntimeError, check_number_operand, check_number_operands, is_number, is_truthy, is_equal, stringify
+from lists import is_list, element_wise, element_wise_negate
+
+# One function per Genesis operator, picked once per Binary/Unary node by the
+# Resolver (node.operation) instead of testing operator types on every run.
+# Each takes the operator Token first, for error reporting.
+# The 'type(x) is int/float' checks are fast paths for the common case; the
+# checks behind them keep float subclasses (e.g. numpy) working.
+# Lists of numbers go element-wise (see lists.py), off the fast paths.
+#
+# Numbers are ints (exact, any size) or floats. Two ints give an int, except
+# through 'over', which always gives a float; an int meeting a float is
+# promoted to float.
+
+def add(operator, left, right):
+    if type(left) is int and type(right) is int:
+        return left + right
+    if type(left) is float and type(right) is float:
+        return left + right
+    if type(left) is str and type(right) is str:
+        return left + right
+
+    if is_number(left) and is_number(right):
+        left, right = promote(operator, left, right)
+        return left + right
+    if isinstance(left, str) and isinstance(right, str):
+        return str(left) + str(right)
+    if isinstance(left, str):
+        return left + stringify(right)
+    if isinstance(right, str):
+        return stringify(left) + right
+    if is_list(left) or is_list(right):
+        return element_wise("plus", operator, left, right)
+    raise RuntimeError(operator, "Operands must be two numbers or two strings.")
+
+def subtract(operator, left, right):
+    if type(left) is int and type(right) is int:
+        return left - right
+    if type(left) is float and type(right) is float:
+        return left - right
+    if is_list(left) or is_list(right):
+        return element_wise("minus", operator, left, right)
+    check_number_operands(operator, left, right)
+    left, right = promote(operator, left, right)
+    return left - right
+
+def multiply(operator, left, right):
+    if type(left) is int and type(right) is int:
+        return left * right
+    if type(left) is float and type(right) is float:
+        return left * right
+    if is_list(left) or is_list(right):
+        return element_wise("times", operator, left, right)
+    check_number_operands(operator, left, right)
+    left, right = promote(operator, left, right)
+    return left * right
+
+def divide(operator, left, right):
+    if is_list(left) or is_list(right):
+        return element_wise("over", operator, left, right)
+    check_number_operands(operator, left, right)
+    if right == 0:
+        raise RuntimeError(operator, "Division by zero.")
+    left, right = promote(operator, left, right)
+    try:
+        # int / int is correctly rounded even past 2^53
+        return left / right
+    except OverflowError:
+        raise RuntimeError(operator, "Result is too large for a decimal number.")
+
+def greater(operator, left, right):
+    if type(left) is int and type(right) is int:
+        return left > right
+    if type(left) is float and type(right) is float:
+        return left > right
+    check_number_operands(operator, left, right)
+    # Python compares ints with floats exactly, no promotion needed
+    return left > right
+
+def less(operator, left, right):
+    if type(left) is int and type(right) is int:
+        return left < right
+    if type(left) is float and type(right) is float:
+        return left < right
+    check_number_operands(operator, left, right)
+    return left < right
+
+def append_text(pieces):
+    # What 'plus' would add to a text for each piece, all in one string
+    return "".join([piece if isinstance(piece, str) else stringify(piece) for piece in pieces])
+
+def add_all(operators, value, pieces):
+    # value plus pieces[0] plus pieces[1] ..., for anything but text
+    for operator, piece in zip(operators, pieces):
+        value = add(operator, value, piece)
+    return value
+
+def promote(operator, left, right):
+    # Two ints stay exact; otherwise both become floats
+    if isinstance(left, int) and isinstance(right, int):
+        return int(left), int(right)
+    try:
+        return float(left), float(right)
+    except OverflowError:
+        raise RuntimeError(operator, "Number is too large to mix with decimals.")
+
+def equal(operator, left, right):
+    return is_equal(left, right)
+
+def not_equal(operator, left, right):
+    return not is_equal(left, right)
+
+def negate(operator, right):
+    if type(right) is int or type(right) is float:
+        return -right
+    if is_list(right):
+        return element_wise_negate(operator, right)
+    check_number_operand(operator, right)
+    return -right
+
+def logical_not(operator, right):
+    return not is_truthy(right)
+
+def unknown_binary(operator, left, right):
+    return None
+
+def unknown_unary(operator, right):
+    return None
+
+BINARY_OPERATIONS = {
+    TokenType.PLUS: add,
+    TokenType.MINUS: subtract,
+    TokenType.TIMES: multiply,
+    TokenType.OVER: divide,
+    TokenType.GREATER: greater,
+    TokenType.LESS: less,
+    TokenType.IS: equal,
+    TokenType.NOT: not_equal, # 'is not'
+}
+
+UNARY_OPERATIONS = {
+    TokenType.MINUS: negate,
+    TokenType.NOT: logical_not,
+}
+
+def binary_operation(operator):
+    return BINARY_OPERATIONS.get(operator.type, unknown_binary)
+
+def unary_operation(operator):
+    return UNARY_OPERATIONS.get(operator.type, unknown_unary)
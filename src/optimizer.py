@@ -0,0 +1,204 @@
+from tokens import TokenType
+from ast_nodes import *
+from values import is_truthy
+from operators import binary_operation, unary_operation
+
+class Optimizer:
+    """
+    AST -> AST pass that runs after parsing, before the Resolver.
+
+    - Folds operators whose operands are all literals: (2 times 3) plus 1 -> 7
+    - Drops Grouping wrappers (they only matter to the parser)
+    - Prunes 'check' statements and loops whose condition is a literal
+    - Short-circuits 'and'/'or' whose left side is a literal
+
+    Folding uses the engines' own operator functions (operators.py), so a
+    folded value is exactly what the program would have computed. Anything
+    that would fail at runtime (e.g. 1 over 0) is left alone so the error
+    still happens there, with its line number.
+    """
+    def optimize(self, statements):
+        return self.statements(statements)
+
+    def statements(self, statements):
+        optimized = []
+        for statement in statements:
+            if statement:
+                statement = statement.accept(self)
+            # Pruned statements (and parse errors) leave nothing to run
+            if statement:
+                optimized.append(statement)
+        return optimized
+
+    def statement(self, stmt):
+        # For places that need *a* statement, even if it was pruned away
+        optimized = stmt.accept(self) if stmt else None
+        return optimized if optimized else Block([])
+
+    def expression(self, expr):
+        return expr.accept(self)
+
+    # --- Statements ---
+
+    def visit_block_stmt(self, stmt):
+        stmt.statements = self.statements(stmt.statements)
+        return stmt
+
+    def visit_expression_stmt(self, stmt):
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visit_print_stmt(self, stmt):
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer != None:
+            stmt.initializer = self.expression(stmt.initializer)
+        return stmt
+
+    def visit_if_stmt(self, stmt):
+        stmt.condition = self.expression(stmt.condition)
+        if isinstance(stmt.condition, Literal):
+            if is_truthy(stmt.condition.value):
+                return stmt.then_branch.accept(self)
+            if stmt.else_branch != None:
+                return stmt.else_branch.accept(self)
+            return None
+
+        stmt.then_branch = self.statement(stmt.then_branch)
+        if stmt.else_branch != None:
+            stmt.else_branch = self.statement(stmt.else_branch)
+        return stmt
+
+    def visit_while_stmt(self, stmt):
+        stmt.condition = self.expression(stmt.condition)
+        if isinstance(stmt.condition, Literal) and not is_truthy(stmt.condition.value):
+            return None
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_times_stmt(self, stmt):
+        stmt.count = self.expression(stmt.count)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_for_each_stmt(self, stmt):
+        stmt.iterable = self.expression(stmt.iterable)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_function_stmt(self, stmt):
+        stmt.body = self.statements(stmt.body)
+        return stmt
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value != None:
+            stmt.value = self.expression(stmt.value)
+        return stmt
+
+    def visit_use_stmt(self, stmt):
+        return stmt
+
+    def visit_flush_stmt(self, stmt):
+        return stmt
+
+    def visit_speak_stmt(self, stmt):
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visit_ask_stmt(self, stmt):
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visit_draw_stmt(self, stmt):
+        stmt.command = self.expression(stmt.command)
+        stmt.arguments = [self.expression(argument) for argument in stmt.arguments]
+        return stmt
+
+    # --- Expressions ---
+
+    def visit_literal_expr(self, expr):
+        return expr
+
+    def visit_variable_expr(self, expr):
+        return expr
+
+    def visit_python_access_expr(self, expr):
+        return expr
+
+    def visit_grouping_expr(self, expr):
+        return self.expression(expr.expression)
+
+    def visit_assign_expr(self, expr):
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visit_parallel_expr(self, expr):
+        expr.iterable = self.expression(expr.iterable)
+        if expr.workers != None:
+            expr.workers = self.expression(expr.workers)
+        expr.body = self.statements(expr.body)
+        return expr
+
+    def visit_call_expr(self, expr):
+        expr.callee = self.expression(expr.callee)
+        expr.arguments = [self.expression(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_call_over_expr(self, expr):
+        expr.callee = self.expression(expr.callee)
+        expr.iterable = self.expression(expr.iterable)
+        return expr
+
+    # Lists and maps are never folded: each evaluation makes a new, changeable one
+
+    def visit_list_expr(self, expr):
+        expr.elements = [self.expression(element) for element in expr.elements]
+        return expr
+
+    def visit_map_expr(self, expr):
+        expr.keys = [self.expression(key) for key in expr.keys]
+        expr.values = [self.expression(value) for value in expr.values]
+        return expr
+
+    def visit_index_expr(self, expr):
+        expr.object = self.expression(expr.object)
+        expr.index = self.expression(expr.index)
+        return expr
+
+    def visit_set_index_expr(self, expr):
+        expr.object = self.expression(expr.object)
+        expr.index = self.expression(expr.index)
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visit_unary_expr(self, expr):
+        expr.right = self.expression(expr.right)
+        if isinstance(expr.right, Literal):
+            return self.fold(expr, unary_operation(expr.operator), expr.operator, expr.right.value)
+        return expr
+
+    def visit_binary_expr(self, expr):
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            return self.fold(expr, binary_operation(expr.operator), expr.operator, expr.left.value, expr.right.value)
+        return expr
+
+    def visit_logical_expr(self, expr):
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        if isinstance(expr.left, Literal):
+            left_is_truthy = is_truthy(expr.left.value)
+            if expr.operator.type == TokenType.OR:
+                return expr.left if left_is_truthy else expr.right
+            return expr.right if left_is_truthy else expr.left
+        return expr
+
+    def fold(self, expr, operation, *operands):
+        try:
+            return Literal(operation(*operands))
+        except Exception:
+            # Would fail at runtime: keep it so it fails there
+            return expr
@@ -0,0 +1,53 @@
+import sys
+
+# Where 'say' (and everything else a program prints) goes. Lines collect in
+# a buffer that is written out in one go when it gets big, at 'flush', and
+# when the program ends: a pipe into a log collector gets a few large writes
+# instead of one per line. On a terminal every line goes out as it is said,
+# so the REPL and long-running scripts show their output as they run.
+#
+#   Interpreter(Output(open("run.log", "w")))  # say into a file
+#   Interpreter(Output(io.StringIO()))         # or into memory, when embedding
+
+BUFFER_SIZE = 64 * 1024 # Characters held before writing
+
+class Output:
+    def __init__(self, stream=None, interactive=None, buffer_size=BUFFER_SIZE):
+        # None: whatever sys.stdout is at the time of writing, so
+        # redirect_stdout (batch, server, parallel workers) still works
+        self.stream = stream
+        if interactive is None:
+            interactive = is_terminal(stream if stream is not None else sys.stdout)
+        self.interactive = interactive # Flush at every line
+        self.buffer_size = buffer_size
+        self.pieces = []
+        self.size = 0
+
+    def line(self, text):
+        self.write(text + "\n")
+
+    def write(self, text):
+        self.pieces.append(text)
+        self.size += len(text)
+        if self.interactive or self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pieces: return
+        text = "".join(self.pieces)
+        self.pieces.clear()
+        self.size = 0
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def getvalue(self):
+        """ Everything said so far, when the stream is an io.StringIO. """
+        self.flush()
+        return self.stream.getvalue()
+
+def is_terminal(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError): # No isatty, or closed
+        return False
@@ -0,0 +1,125 @@
+import io
+import os
+import sys
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from values import RuntimeError
+
+# Worker pools behind 'for each item in list in parallel do ... end'.
+#
+# Threads (the default) suit bodies that wait (Python bridge calls, 'ask',
+# speech): the GIL is released while they do. Processes ('in parallel
+# processes') suit bodies that compute: each gets its own interpreter and
+# core. Processes are forked, so the children start with the whole program
+# state and nothing has to be pickled but each iteration's result; what
+# they change is lost with them (the Resolver rejects changing outer
+# variables in such a body).
+#
+# Either way every iteration runs in a fresh engine (sharing the globals),
+# its output is captured, and the caller prints it in list order.
+
+MAX_THREADS = 32
+
+def run_iterations(interpreter, keyword, function, items, workers=None, processes=False):
+    """ (result, output, RuntimeError or None) for each item, in order. """
+    if not items:
+        return []
+    if processes and can_fork():
+        return map_processes(interpreter, keyword, function, items, workers or os.cpu_count() or 1)
+    return map_threads(interpreter, function, items, workers or min(MAX_THREADS, len(items)))
+
+def can_fork():
+    # Pool workers (batch.py, server.py) are daemons, which can't have
+    # children; and forking from a thread other than the main one is unsafe.
+    return ("fork" in multiprocessing.get_all_start_methods()
+            and not multiprocessing.current_process().daemon
+            and threading.current_thread() is threading.main_thread())
+
+# --- Threads ---
+
+class ThreadOutput:
+    """ Stands in for sys.stdout, sending what each capturing thread prints to its own buffer. """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.users = 0 # Parallel loops running (they can nest)
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        if getattr(self.local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    @contextlib.contextmanager
+    def capture(self):
+        previous = getattr(self.local, 'buffer', None)
+        self.local.buffer = buffer = io.StringIO()
+        try:
+            yield buffer
+        finally:
+            self.local.buffer = previous
+
+_output_lock = threading.Lock()
+
+@contextlib.contextmanager
+def thread_output():
+    with _output_lock:
+        output = sys.stdout
+        if not isinstance(output, ThreadOutput):
+            output = sys.stdout = ThreadOutput(sys.stdout)
+        output.users += 1
+    try:
+        yield output
+    finally:
+        with _output_lock:
+            output.users -= 1
+            if output.users == 0:
+                sys.stdout = output.stream
+
+def map_threads(interpreter, function, items, workers):
+    with thread_output() as output:
+        def iteration(item):
+            with output.capture() as buffer:
+                try:
+                    value = interpreter.spawn().call_function(function, [item])
+                    return value, buffer.getvalue(), None
+                except RuntimeError as error:
+                    return None, buffer.getvalue(), error
+
+        with ThreadPoolExecutor(workers, thread_name_prefix="genesis-parallel") as pool:
+            return list(pool.map(iteration, items))
+
+# --- Processes ---
+
+# (interpreter, function, items) of the loop being forked, inherited by its workers
+_job = None
+
+def process_iteration(index):
+    interpreter, function, items = _job
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            value = interpreter.spawn().call_function(function, [items[index]])
+            return value, output.getvalue(), None
+        except RuntimeError as error:
+            return None, output.getvalue(), (error.token, str(error))
+
+def map_processes(interpreter, keyword, function, items, workers):
+    global _job
+    sys.stdout.flush() # Or the children print what the parent had buffered
+    _job = (interpreter, function, items)
+    try:
+        with multiprocessing.get_context("fork").Pool(min(workers, len(items))) as pool:
+            results = pool.map(process_iteration, range(len(items)))
+    except multiprocessing.pool.MaybeEncodingError as e:
+        raise RuntimeError(keyword, f"A result can't be sent back from a worker process ({e.exc}). Try 'in parallel threads'.")
+    finally:
+        _job = None
+    return [(value, output, error and RuntimeError(*error)) for value, output, error in results]
@@ -1,13 +1,26 @@
+from collections import deque
 from tokens import TokenType, Token
 from ast_nodes import *
 
 class ParseError(Exception):
     pass
 
+# '... in parallel with 4 processes do'
+POOL_KINDS = {
+    "threads": "threads",
+    "thread": "threads",
+    "processes": "processes",
+    "process": "processes",
+}
+
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.current = 0
+        # Any iterable of tokens ending with EOF: a list, or Lexer.scan()
+        # to parse while lexing. Only the tokens still needed are kept:
+        # the previous one and up to two ahead.
+        self.tokens = iter(tokens)
+        self.lookahead = deque([next(self.tokens)])
+        self.previous_token = None
         self.had_error = False
 
 
@@ -23,13 +36,17 @@ class Parser:
             # Allow 'and' to start a new sentence (connector)
             while self.match(TokenType.AND): pass
             
+            line = self.peek().line
             if self.match(TokenType.TO):
-                return self.function("function")
-            if self.match(TokenType.USE):
-                return self.use_statement()
-            if self.match(TokenType.SET):
-                return self.var_declaration()
-            return self.statement()
+                stmt = self.function("function")
+            elif self.match(TokenType.USE):
+                stmt = self.use_statement()
+            elif self.match(TokenType.SET):
+                stmt = self.var_declaration()
+            else:
+                return self.statement()
+            stmt.line = line
+            return stmt
         except ParseError:
             self.synchronize()
             return None
@@ -56,7 +73,9 @@ class Parser:
 
     def statement(self):
         # 1. Parse the core statement (e.g. say "hi")
+        line = self.peek().line
         stmt = self.core_statement()
+        stmt.line = line
         
         # 2. Check for modifiers (Natural Syntax)
         
@@ -64,15 +83,17 @@ class Parser:
         if self.match(TokenType.CHECK):
             condition = self.expression()
             stmt = If(condition, Block([stmt]), None)
+            stmt.line = line
 
         # Postfix Times: ... 5 times
         # We look for NUMBER then TIMES
         if self.check(TokenType.NUMBER):
             # Peek ahead to see if 'times' follows
-            if self.tokens[self.current + 1].type == TokenType.TIMES:
+            if self.peek_next().type == TokenType.TIMES:
                 count = self.expression() # Consumes the number
                 self.consume(TokenType.TIMES, "Expect 'times' after number.")
                 stmt = Times(count, stmt)
+                stmt.line = line
 
         return stmt
 
@@ -95,6 +116,14 @@ class Parser:
             return self.draw_statement()
         if self.match(TokenType.ASK):
             return self.ask_statement()
+
+        # v6
+        if self.match(TokenType.FOR):
+            loop = self.for_each()
+            # A parallel loop is an expression (its results), here unused
+            return loop if isinstance(loop, Stmt) else Expression(loop)
+        if self.match(TokenType.FLUSH):
+            return Flush()
             
         return self.expression_statement()
 
@@ -155,9 +184,20 @@ class Parser:
         
     def assignment_statement(self):
         name = self.consume(TokenType.IDENTIFIER, "Expect variable name after 'update'.")
+
+        # update scores["bob"] to 10, update grid[0][1] to 5
+        target = None
+        while self.match(TokenType.LEFT_BRACKET):
+            bracket = self.previous()
+            index = self.expression()
+            self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after index.")
+            target = (Variable(name) if target is None else Index(*target), bracket, index)
+
         self.consume(TokenType.TO, "Expect 'to' after variable name.")
         value = self.expression()
-        return Assign(name, value)
+        if target is not None:
+            return Expression(SetIndex(*target, value))
+        return Expression(Assign(name, value))
 
     def while_statement(self):
         self.consume(TokenType.WHILE, "Expect 'while' after 'loop'.")
@@ -207,7 +247,7 @@ class Parser:
             # Look ahead: If 'and' is followed by a statement keyword, 
             # it is a sentence connector, NOT a logical operator.
             # We break/return so the expression ends, and declaration() picks up the 'and'.
-            next_token = self.tokens[self.current + 1] # Peek next
+            next_token = self.peek_next()
             if next_token.type in [
                 TokenType.SAY, TokenType.SET, TokenType.UPDATE, 
                 TokenType.CHECK, TokenType.LOOP, TokenType.TO, 
@@ -282,9 +322,40 @@ class Parser:
 
         if self.match(TokenType.PYTHON):
             return self.python_access()
+
+        if self.match(TokenType.FOR):
+            loop = self.for_each()
+            if isinstance(loop, Stmt):
+                raise self.error(loop.keyword, "Only a 'for each ... in parallel' loop has a value.")
+            return loop
             
         return self.primary()
 
+    def for_each(self):
+        # for each item in list do ... end
+        # for each url in urls in parallel [with 8] [threads|processes] do ... end
+        # ('in' is a noise word, so it never reaches us)
+        keyword = self.previous()
+        self.consume(TokenType.EACH, "Expect 'each' after 'for'.")
+        name = self.consume(TokenType.IDENTIFIER, "Expect variable name after 'for each'.")
+        iterable = self.expression()
+
+        if not self.match(TokenType.PARALLEL):
+            self.consume(TokenType.DO, "Expect 'do' after the list.")
+            return ForEach(keyword, name, iterable, Block(self.block()))
+
+        workers = None
+        if self.match(TokenType.WITH):
+            workers = self.expression()
+
+        mode = None
+        if self.check(TokenType.IDENTIFIER) and self.peek().lexeme.lower() in POOL_KINDS:
+            mode = POOL_KINDS[self.advance().lexeme.lower()]
+
+        self.consume(TokenType.DO, "Expect 'do' before loop body.")
+        body = self.block()
+        return Parallel(keyword, name, iterable, body, workers, mode)
+
     def python_access(self):
         # python math.pi
         chain = []
@@ -293,7 +364,7 @@ class Parser:
         while self.match(TokenType.DOT):
             chain.append(self.consume(TokenType.IDENTIFIER, "Expect property name.").lexeme)
             
-        return PythonAccess(chain)
+        return self.subscripts(PythonAccess(chain))
 
     def call(self):
         # call name with arg1, arg2
@@ -304,6 +375,10 @@ class Parser:
         
         if self.match(TokenType.PYTHON):
             callee = self.python_access()
+            # call python math.sqrt over numbers: every item in one go
+            # ('call getn over 2' still divides a Genesis call's result)
+            if self.match(TokenType.OVER):
+                return CallOver(callee, callee_token, self.expression())
         else:
             callee_name = self.consume(TokenType.IDENTIFIER, "Expect function name after 'call'.")
             callee = Variable(callee_name)
@@ -320,6 +395,18 @@ class Parser:
 
 
     def primary(self):
+        return self.subscripts(self.atom())
+
+    def subscripts(self, expr):
+        # scores["bob"], grid[0][1]
+        while self.match(TokenType.LEFT_BRACKET):
+            bracket = self.previous()
+            index = self.expression()
+            self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after index.")
+            expr = Index(expr, bracket, index)
+        return expr
+
+    def atom(self):
         if self.match(TokenType.FALSE): return Literal(False)
         if self.match(TokenType.TRUE): return Literal(True)
         if self.match(TokenType.NOTHING): return Literal(None)
@@ -335,6 +422,30 @@ class Parser:
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
             return Grouping(expr)
 
+        if self.match(TokenType.LEFT_BRACKET):
+            # [1, 2, 3]
+            elements = []
+            if not self.check(TokenType.RIGHT_BRACKET):
+                while True:
+                    elements.append(self.expression())
+                    if not self.match(TokenType.COMMA): break
+            self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after list items.")
+            return ListLiteral(elements)
+
+        if self.match(TokenType.LEFT_BRACE):
+            # {"bob": 10, "amy": 12}
+            brace = self.previous()
+            keys = []
+            values = []
+            if not self.check(TokenType.RIGHT_BRACE):
+                while True:
+                    keys.append(self.expression())
+                    self.consume(TokenType.COLON, "Expect ':' after map key.")
+                    values.append(self.expression())
+                    if not self.match(TokenType.COMMA): break
+            self.consume(TokenType.RIGHT_BRACE, "Expect '}' after map entries.")
+            return MapLiteral(brace, keys, values)
+
         raise self.error(self.peek(), "Expect expression.")
 
     def match(self, *types):
@@ -353,17 +464,27 @@ class Parser:
         return self.peek().type == type
 
     def advance(self):
-        if not self.is_at_end(): self.current += 1
+        if not self.is_at_end():
+            self.previous_token = self.lookahead.popleft()
+            if not self.lookahead:
+                self.lookahead.append(next(self.tokens))
         return self.previous()
 
     def is_at_end(self):
-        return self.peek().type == TokenType.EOF
+        return self.lookahead[0].type == TokenType.EOF
 
     def peek(self):
-        return self.tokens[self.current]
+        return self.lookahead[0]
+
+    def peek_next(self):
+        # The token after peek(); EOF keeps answering once it is reached
+        if len(self.lookahead) < 2:
+            if self.is_at_end(): return self.lookahead[0]
+            self.lookahead.append(next(self.tokens))
+        return self.lookahead[1]
 
     def previous(self):
-        return self.tokens[self.current - 1]
+        return self.previous_token
 
     def error(self, token, message):
         if token.type == TokenType.EOF:
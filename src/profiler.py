@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from interpreter import Interpreter, GenesisFunction
+from vm import VM
+
+# genesis --profile: where a program spends its time, in Genesis terms.
+#
+# A background thread looks at the running program every INTERVAL seconds
+# and records its Genesis call stack: which function called which, from
+# which line, down to the line running now. Nothing is added to the engines'
+# hot paths but a call counter. The stack is read from the engine's own
+# Python frames: execute_statements' current statement and GenesisFunction
+# calls for the tree-walker, VM.run's code, ip and call frames for the VM.
+#
+# The report shows the busiest lines and functions; the samples are also
+# written as collapsed stacks, ready for flamegraph.pl or speedscope:
+#
+#   <script> (fib.gen:12);fib (fib.gen:5);fib (fib.gen:5) 31
+
+INTERVAL = 0.001 # Seconds between samples
+TOP = 15 # Rows per table
+
+# Python code objects the stack is read from
+STATEMENT_RUNNERS = (Interpreter.interpret.__code__, Interpreter.execute_statements.__code__)
+FUNCTION_CALL = GenesisFunction.call.__code__
+VM_RUN = VM.run.__code__
+
+class Profiler:
+    def __init__(self, interpreter, interval=INTERVAL):
+        self.interpreter = interpreter
+        self.interval = interval
+        self.thread_id = threading.get_ident() # The thread running the program
+        self.samples = Counter() # Stack: ((function, line), ... innermost last) -> samples
+        self.code_objects = {} # id(instruction list) -> CodeObject, for the VM
+        self.stopped = threading.Event()
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.interpreter.call_counts = Counter()
+        # Let the sampler in as often as it asks (the GIL otherwise switches every 5ms)
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval)
+        self.thread = threading.Thread(target=self.sample, name="genesis-profiler", daemon=True)
+        self.start = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
+        self.stopped.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = self.stack_of(frame) if frame is not None else None
+            if stack:
+                self.samples[stack] += 1
+
+    def stack_of(self, frame):
+        """ The Genesis stack the Python stack ending at frame is running, outermost first. """
+        python_frames = []
+        while frame is not None:
+            python_frames.append(frame)
+            frame = frame.f_back
+        python_frames.reverse()
+
+        stack = []
+        name, line = "<script>", None
+        for frame in python_frames:
+            code = frame.f_code
+            if code is VM_RUN:
+                stack.extend(self.vm_stack(frame.f_locals))
+            elif code in STATEMENT_RUNNERS:
+                statement = frame.f_locals.get('statement')
+                line = getattr(statement, 'line', None) or line
+            elif code is FUNCTION_CALL:
+                stack.append((name, line))
+                name, line = frame.f_locals['self'].name, None
+        if not stack and line is None:
+            return None # Not running Genesis code (yet)
+        if line is not None:
+            stack.append((name, line))
+        return tuple(stack)
+
+    def vm_stack(self, variables):
+        script = variables.get('script')
+        code = variables.get('code')
+        if script is None or code is None:
+            return []
+        if id(script.code) not in self.code_objects:
+            self.add_code_objects(script)
+        # Copied first: the program keeps running while we look. A caller's
+        # ip is just past its CALL; the running code's is the next instruction
+        # (right after a jump, the one jumped to).
+        calls = [(entry[0], entry[1] - 2) for entry in list(variables['frames'])]
+        calls.append((code, variables['ip']))
+        stack = []
+        for instructions, index in calls:
+            code_object = self.code_objects.get(id(instructions))
+            if code_object is not None:
+                stack.append((code_object.name, code_object.line_at(index)))
+        return stack
+
+    def add_code_objects(self, code_object):
+        self.code_objects[id(code_object.code)] = code_object
+        for nested in code_object.nested():
+            self.add_code_objects(nested)
+
+    # --- Results ---
+
+    def report(self, script, top=TOP, out=None):
+        out = out or sys.stderr # At the time of reporting: the server redirects it per run
+        total = sum(self.samples.values())
+        name = os.path.basename(script)
+        out.write(f"\n⏱️  Profile of {name}: {total} samples over {self.elapsed:.2f}s\n")
+        if not total:
+            out.write("   Too quick to sample anything.\n")
+            return
+        seconds = self.elapsed / total
+
+        lines_self, lines_total = Counter(), Counter()
+        functions_self, functions_total = Counter(), Counter()
+        for stack, count in self.samples.items():
+            lines_self[stack[-1]] += count
+            functions_self[stack[-1][0]] += count
+            for frame in set(stack):
+                lines_total[frame] += count
+            for function in set(function for function, line in stack):
+                functions_total[function] += count
+
+        def cell(count):
+            return f"{count * seconds:8.3f}s {count / total:5.1%}"
+
+        out.write(f"\n   {'Line':<28} {'self':>15}  {'total':>15}\n")
+        for frame, count in lines_self.most_common(top):
+            function, line = frame
+            out.write(f"   {f'{name}:{line}  {function}':<28} {cell(count)}  {cell(lines_total[frame])}\n")
+
+        calls = self.interpreter.call_counts or Counter()
+        out.write(f"\n   {'Function':<18} {'calls':>9} {'self':>15}  {'total':>15}\n")
+        for function, count in functions_total.most_common(top):
+            called = calls[function] if function in calls else "-"
+            out.write(f"   {function:<18} {called:>9} {cell(functions_self[function])}  {cell(count)}\n")
+
+    def write_stacks(self, path, script):
+        """ Collapsed stacks (one 'frame;frame;frame count' line per stack), for flame graphs. """
+        name = os.path.basename(script)
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.samples.most_common():
+                frames = ";".join(f"{function} ({name}:{line})" for function, line in stack)
+                file.write(f"{frames} {count}\n")
+
+def stacks_path(script):
+    """ Where --profile writes the collapsed stacks: <script name>.folded in the current directory. """
+    return os.path.splitext(os.path.basename(script))[0] + ".folded"
+
+def profile(script, interpreter, statements, frame_size):
+    """ Runs a compiled program under the profiler and reports on it. """
+    with Profiler(interpreter) as profiler:
+        interpreter.interpret(statements, frame_size)
+    profiler.report(script)
+    path = stacks_path(script)
+    profiler.write_stacks(path, script)
+    sys.stderr.write(f"\n   Collapsed stacks written to {path} (for flamegraph.pl or speedscope)\n")
@@ -0,0 +1,282 @@
+from tokens import TokenType
+from ast_nodes import *
+from operators import binary_operation, unary_operation
+from bridge import InlineCache
+
+class FrameScope:
+    """ The nested block scopes that share one runtime Frame. """
+    def __init__(self):
+        self.blocks = [] # Stack of {name: slot}, innermost last
+        self.size = 0    # Slots handed out so far
+        self.texts = set() # Slots 'set' to a text literal somewhere
+
+class Resolver:
+    """
+    Static pass that runs between Parser.parse() and execution.
+
+    Every local variable gets a fixed slot in the Frame of the function it
+    is declared in (blocks don't get frames of their own), and every Variable,
+    Assign and PythonAccess node is annotated with (depth, slot): how many
+    frames to hop outwards through closures, and which slot to index there.
+    Names that are not declared in any enclosing local scope are globals
+    (depth None) and are still looked up by name, so the REPL can keep adding
+    them line by line.
+
+    Because scopes are resolved where the code is written, functions see the
+    variables around their definition (lexical scope), not their caller's.
+
+    Binary and Unary nodes also get their operator function (node.operation)
+    from operators.py, so running them needs no operator type checks.
+    """
+    def __init__(self):
+        # The first frame holds locals of top level blocks (loop bodies etc.)
+        self.frames = [FrameScope()]
+        # Indexes in self.frames of the 'in parallel processes' bodies being resolved
+        self.process_bodies = []
+        self.had_error = False
+        # Globals 'set' to a text literal somewhere (see appends())
+        self.global_texts = set()
+
+    @property
+    def frame_size(self):
+        # Slots the top level script frame needs
+        return self.frames[0].size
+
+    def resolve(self, statements):
+        for statement in statements:
+            if statement:
+                statement.accept(self)
+        return statements
+
+    def resolve_expr(self, expr):
+        if expr != None:
+            expr.accept(self)
+
+    def resolve_stmt(self, stmt):
+        if stmt != None:
+            stmt.accept(self)
+
+    def begin_scope(self):
+        self.frames[-1].blocks.append({})
+
+    def end_scope(self):
+        self.frames[-1].blocks.pop()
+
+    def declare(self, name):
+        frame = self.frames[-1]
+
+        # Top level declarations are globals
+        if not frame.blocks:
+            return None
+
+        scope = frame.blocks[-1]
+        if name not in scope:
+            # Slots are never reused: a closure may still see an ended block's variables
+            scope[name] = frame.size
+            frame.size += 1
+        return scope[name]
+
+    def lookup(self, name):
+        for depth, frame in enumerate(reversed(self.frames)):
+            for scope in reversed(frame.blocks):
+                if name in scope:
+                    return depth, scope[name]
+        return None, None
+
+    # --- Statements ---
+
+    def visit_block_stmt(self, stmt):
+        self.begin_scope()
+        self.resolve(stmt.statements)
+        self.end_scope()
+
+    def visit_var_stmt(self, stmt):
+        # The initializer still sees the outer variable: 'set x to x plus 1'
+        self.resolve_expr(stmt.initializer)
+        stmt.slot = self.declare(stmt.name.lexeme)
+        if isinstance(stmt.initializer, Literal) and isinstance(stmt.initializer.value, str):
+            if stmt.slot is None:
+                self.global_texts.add(stmt.name.lexeme)
+            else:
+                self.frames[-1].texts.add(stmt.slot)
+
+    def visit_function_stmt(self, stmt):
+        # Declare the name first so the function can call itself
+        stmt.slot = self.declare(stmt.name.lexeme)
+
+        self.frames.append(FrameScope())
+        self.begin_scope()
+        for param in stmt.params:
+            self.declare(param.lexeme)
+        self.resolve(stmt.body)
+        self.end_scope()
+        stmt.size = self.frames.pop().size
+
+    def visit_expression_stmt(self, stmt):
+        self.resolve_expr(stmt.expression)
+
+    def visit_print_stmt(self, stmt):
+        self.resolve_expr(stmt.expression)
+
+    def visit_if_stmt(self, stmt):
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.then_branch)
+        self.resolve_stmt(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt):
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.body)
+
+    def visit_times_stmt(self, stmt):
+        self.resolve_expr(stmt.count)
+        self.resolve_stmt(stmt.body)
+
+    def visit_for_each_stmt(self, stmt):
+        self.resolve_expr(stmt.iterable)
+        # The item variable belongs to the loop, like a block's locals
+        self.begin_scope()
+        stmt.slot = self.declare(stmt.name.lexeme)
+        self.resolve_stmt(stmt.body)
+        self.end_scope()
+
+    def visit_return_stmt(self, stmt):
+        self.resolve_expr(stmt.value)
+
+    def visit_use_stmt(self, stmt):
+        pass
+
+    def visit_flush_stmt(self, stmt):
+        pass
+
+    def visit_speak_stmt(self, stmt):
+        self.resolve_expr(stmt.expression)
+
+    def visit_ask_stmt(self, stmt):
+        self.resolve_expr(stmt.expression)
+
+    def visit_draw_stmt(self, stmt):
+        self.resolve_expr(stmt.command)
+        for argument in stmt.arguments:
+            self.resolve_expr(argument)
+
+    # --- Expressions ---
+
+    def visit_variable_expr(self, expr):
+        expr.depth, expr.slot = self.lookup(expr.name.lexeme)
+
+    def visit_assign_expr(self, expr):
+        self.resolve_expr(expr.value)
+        expr.depth, expr.slot = self.lookup(expr.name.lexeme)
+        self.check_outer_change(expr.name, expr.depth)
+        expr.appends = self.appends(expr)
+
+    def appends(self, expr):
+        # 'update report to report plus line plus "!"' builds text up a piece
+        # at a time. Copying the whole text for each piece makes a loop of
+        # these quadratic; marked, the engines append to it in place instead.
+        appends = []
+        value = expr.value
+        while isinstance(value, Binary) and value.operator.type == TokenType.PLUS:
+            appends.append(value)
+            value = value.left
+        if not (appends and isinstance(value, Variable) and value.name.lexeme == expr.name.lexeme
+                and value.depth == expr.depth and value.slot == expr.slot):
+            return None
+
+        # Only where it looks like text: counters keep the plain 'plus' fast path
+        # (the engines check for text when running anyway)
+        if expr.depth is None:
+            is_text = expr.name.lexeme in self.global_texts
+        else:
+            is_text = expr.slot in self.frames[-1 - expr.depth].texts
+        if not is_text and not any(isinstance(binary.right, Literal) and isinstance(binary.right.value, str)
+                                   for binary in appends):
+            return None
+
+        appends.reverse()
+        return appends
+
+    def visit_python_access_expr(self, expr):
+        # 'python resp.read' may start at a variable rather than a module
+        expr.depth, expr.slot = self.lookup(expr.property_chain[0])
+        expr.cache = InlineCache()
+
+    def visit_parallel_expr(self, expr):
+        self.resolve_expr(expr.iterable)
+        self.resolve_expr(expr.workers)
+        if expr.mode is None:
+            expr.mode = "threads" # Processes only when asked for (see check_outer_change)
+
+        # Each iteration runs like a call of the body with the item as its parameter
+        self.frames.append(FrameScope())
+        if expr.mode == "processes":
+            self.process_bodies.append(len(self.frames) - 1)
+        self.begin_scope()
+        self.declare(expr.name.lexeme)
+        self.resolve(expr.body)
+        self.end_scope()
+        if expr.mode == "processes":
+            self.process_bodies.pop()
+        expr.size = self.frames.pop().size
+
+    def check_outer_change(self, name, depth):
+        # Process iterations run in forked copies of the program: a variable
+        # from outside the body changed there stays unchanged for everyone else
+        if not self.process_bodies:
+            return
+        if depth is None or len(self.frames) - 1 - depth < self.process_bodies[-1]:
+            self.error(name, f"Can't change '{name.lexeme}' in an 'in parallel processes' loop: "
+                             "each iteration only has a copy. Return a value instead, or use threads.")
+
+    def error(self, token, message):
+        print(f"⚠️  Code Error [line {token.line}]: {message}")
+        self.had_error = True
+
+    def visit_binary_expr(self, expr):
+        # Specialize the node: no operator type tests left at runtime
+        expr.operation = binary_operation(expr.operator)
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_logical_expr(self, expr):
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_unary_expr(self, expr):
+        expr.operation = unary_operation(expr.operator)
+        self.resolve_expr(expr.right)
+
+    def visit_grouping_expr(self, expr):
+        self.resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr):
+        pass
+
+    def visit_call_expr(self, expr):
+        self.resolve_expr(expr.callee)
+        for argument in expr.arguments:
+            self.resolve_expr(argument)
+
+    def visit_call_over_expr(self, expr):
+        self.resolve_expr(expr.callee)
+        self.resolve_expr(expr.iterable)
+
+    def visit_list_expr(self, expr):
+        for element in expr.elements:
+            self.resolve_expr(element)
+
+    def visit_map_expr(self, expr):
+        for key, value in zip(expr.keys, expr.values):
+            self.resolve_expr(key)
+            self.resolve_expr(value)
+
+    def visit_index_expr(self, expr):
+        self.resolve_expr(expr.object)
+        self.resolve_expr(expr.index)
+
+    def visit_set_index_expr(self, expr):
+        self.resolve_expr(expr.object)
+        self.resolve_expr(expr.index)
+        self.resolve_expr(expr.value)
+        if isinstance(expr.object, Variable):
+            self.check_outer_change(expr.object.name, expr.object.depth)
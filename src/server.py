@@ -0,0 +1,232 @@
+import os
+import io
+import sys
+import json
+import signal
+import argparse
+import threading
+import contextlib
+import itertools
+import socketserver
+import multiprocessing
+from queue import SimpleQueue
+from main import run, parse_args, ENGINES
+from batch import run_script
+from client import socket_path, send, forwarded_environment
+
+# Genesis server: a long-running daemon with a pool of pre-warmed worker
+# processes, taking script runs over a local Unix socket from client.py.
+# Workers have everything imported and both engines exercised before the
+# first request, and each script still runs in a fresh interpreter.
+#
+#   python3 server.py --workers 4 &    # start
+#   python3 client.py my_script.gen    # instead of 'genesis my_script.gen'
+#   python3 server.py --stop           # stop
+#
+# A script runs with the client's GENESIS_*, OPENAI_* and proxy environment
+# variables, and what it prints is streamed back to the client as it goes:
+# workers put it on one queue shared with the server, which hands every
+# piece to the connection of the run it belongs to.
+
+# Run by every worker once, when it starts
+WARM_UP = """
+to double with x do
+    return x times 2
+end
+set n to call double with 21
+check n is greater than 1 then
+    say "warm " plus n
+end
+"""
+
+# Set in every worker by warm_up: where runs send their output
+messages = None
+
+def warm_up(queue):
+    global messages
+    messages = queue
+    # Deep Genesis recursion on the tree-walker needs Python stack
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    # Workers must not take the server's Ctrl+C: the server shuts them down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for engine in ENGINES.values():
+            run(WARM_UP, engine())
+
+class StreamedOutput(io.TextIOBase):
+    """ A worker's stdout or stderr for one run: everything written goes straight to the client. """
+    def __init__(self, run_id, kind, interactive):
+        self.run_id = run_id
+        self.kind = kind # "output" or "error"
+        self.interactive = interactive
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        # Buffered like the client's own stdout would be (see output.py)
+        return self.interactive
+
+    def write(self, text):
+        if text:
+            messages.put((self.run_id, {self.kind: text}))
+        return len(text)
+
+# The forwarded variables of this worker's last run
+last_environment = None
+
+@contextlib.contextmanager
+def client_environment(env):
+    """ The client's forwarded variables in place of the worker's, for one run. """
+    global last_environment
+    own = forwarded_environment(os.environ)
+    for name in own:
+        del os.environ[name]
+    os.environ.update(env)
+    if env != last_environment and "ai_engine" in sys.modules:
+        # Its settings were read from another run's environment
+        sys.modules["ai_engine"].reset()
+    last_environment = env
+    try:
+        yield
+    finally:
+        for name in env:
+            os.environ.pop(name, None)
+        os.environ.update(own)
+
+def execute(run_id, argv, cwd, env, interactive):
+    """ Runs one 'genesis' command line in a worker, streaming output and then the response. """
+    stdout = StreamedOutput(run_id, "output", interactive)
+    stderr = StreamedOutput(run_id, "error", interactive)
+    messages.put((run_id, execute_run(argv, cwd, env, stdout, stderr)))
+
+def execute_run(argv, cwd, env, stdout, stderr):
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stderr(stderr):
+            args = parse_args(argv)
+    except SystemExit as e:
+        # Bad arguments: argparse has explained why
+        return {"status": e.code or 0, "elapsed": 0}
+    except OSError as e:
+        stdout.write(f"❌ System Error: {e}\n")
+        return {"status": 1, "elapsed": 0}
+
+    with client_environment(env):
+        result = run_script(args.script, args.engine, args.optimize, args.use_cache, args.dump_ast, args.output,
+                            args.bridge_stats, args.profile, args.ai_stats, stdout=stdout, stderr=stderr)
+    return {"status": result.exit_status, "elapsed": result.elapsed}
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return # Not a client of ours
+
+        command = request.get("command")
+        if command == "stop":
+            self.reply({"stopped": True})
+            # shutdown() waits for serve_forever(), so not from this thread
+            threading.Thread(target=self.server.shutdown).start()
+        elif command == "ping":
+            self.reply({"workers": self.server.workers, "pid": os.getpid()})
+        else:
+            self.run(request)
+
+    def run(self, request):
+        run_id, replies = self.server.open_run()
+        try:
+            arguments = (run_id, request["argv"], request["cwd"], request.get("env", {}), request.get("interactive", False))
+            self.server.pool.apply_async(execute, arguments,
+                error_callback=lambda e: replies.put({"error": f"❌ Server Error: {e!r}\n", "status": 1}))
+            while True:
+                reply = replies.get()
+                self.reply(reply)
+                if "status" in reply: break
+        except OSError:
+            pass # The client went away; the run still finishes in its worker
+        finally:
+            self.server.close_run(run_id)
+
+    def reply(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b"\n")
+
+class GenesisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, workers):
+        self.workers = workers
+        self.messages = multiprocessing.Queue() # (run id, message) from every worker
+        self.runs = {} # run id -> SimpleQueue of messages for its connection
+        self.run_ids = itertools.count()
+        self.pool = multiprocessing.Pool(workers, initializer=warm_up, initargs=(self.messages,))
+        threading.Thread(target=self.route_messages, name="genesis-messages", daemon=True).start()
+        super().__init__(path, RequestHandler)
+
+    def open_run(self):
+        run_id = next(self.run_ids)
+        replies = self.runs[run_id] = SimpleQueue()
+        return run_id, replies
+
+    def close_run(self, run_id):
+        self.runs.pop(run_id, None)
+
+    def route_messages(self):
+        while True:
+            run_id, message = self.messages.get()
+            replies = self.runs.get(run_id)
+            if replies is not None:
+                replies.put(message)
+
+def terminate(signum, frame):
+    # 'kill' stops the server like Ctrl+C or --stop does
+    raise SystemExit(0)
+
+def serve(path, workers):
+    if send({"command": "ping"}, path, timeout=1) is not None:
+        print(f"❌ A Genesis server is already running on {path}")
+        sys.exit(1)
+    if os.path.exists(path):
+        os.remove(path) # Left over from a server that didn't stop cleanly
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    # Only this user may submit scripts
+    old_umask = os.umask(0o077)
+    try:
+        server = GenesisServer(path, workers)
+    finally:
+        os.umask(old_umask)
+
+    print(f"✨ Genesis server listening on {path} ({workers} workers)")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        server.pool.terminate()
+        if os.path.exists(path):
+            os.remove(path)
+        print("👋 Genesis server stopped.")
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="genesis-server", description="Run Genesis scripts for client.py from pre-warmed workers")
+    arg_parser.add_argument("--socket", default=None, help=f"Unix socket path (default: {socket_path()})")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="worker processes (default: one per CPU)")
+    arg_parser.add_argument("--stop", action="store_true", help="stop the running server")
+    args = arg_parser.parse_args()
+
+    path = args.socket or socket_path()
+    if args.stop:
+        if send({"command": "stop"}, path) is None:
+            print(f"❌ No Genesis server is running on {path}")
+            sys.exit(1)
+        return
+
+    serve(path, args.workers)
+
+if __name__ == '__main__':
+    main()
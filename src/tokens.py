@@ -6,6 +6,11 @@ class TokenType(Enum):
     RIGHT_PAREN = auto() # )
     COMMA = auto()
     DOT = auto()
+    LEFT_BRACKET = auto()  # [ - lists and indexing
+    RIGHT_BRACKET = auto() # ]
+    LEFT_BRACE = auto()    # { - maps
+    RIGHT_BRACE = auto()   # }
+    COLON = auto()         # key: value
     
     # We treat newlines as statement separators in this new version, or just optional
     EOF = auto()
@@ -51,12 +56,26 @@ class TokenType(Enum):
     USE = auto()    # use (import)
     PYTHON = auto() # python (bridge)
     CALL = auto()   # call (invoke)
+
+    # v5 (AI, Voice, Graphics)
+    SPEAK = auto()  # speak (text to speech)
+    DRAW = auto()   # draw (turtle graphics)
+    ASK = auto()    # ask (AI engine)
+
+    # v6 (Collections, Parallelism)
+    FOR = auto()      # for each ... (loop over a list)
+    EACH = auto()     # each
+    PARALLEL = auto() # ... in parallel (across a worker pool)
+    FLUSH = auto()    # flush (write out buffered output)
     
     TRUE = auto()
     FALSE = auto()
     NOTHING = auto() # null
 
 class Token:
+    # No per-token __dict__: big programs have a lot of tokens
+    __slots__ = ('type', 'lexeme', 'literal', 'line')
+
     def __init__(self, type, lexeme, literal, line):
         self.type = type
         self.lexeme = lexeme
@@ -0,0 +1,171 @@
+import sys
+
+# Genesis runtime values: how they print, compare and count as true,
+# shared by the operators and both engines.
+# Numbers are Python ints (whole number literals, exact) and floats.
+
+# Exact ints can get long (a factorial of 2000 has 5736 digits): print them whole
+if hasattr(sys, "set_int_max_str_digits"):
+    sys.set_int_max_str_digits(0)
+
+class RuntimeError(Exception):
+    def __init__(self, token, message):
+        super().__init__(message)
+        self.token = token
+
+def is_number(value):
+    # true and false are ints to Python, but not numbers to Genesis
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def check_number_operand(operator, operand):
+    if is_number(operand): return
+    raise RuntimeError(operator, "Operand must be a number.")
+
+def check_number_operands(operator, left, right):
+    if is_number(left) and is_number(right): return
+    raise RuntimeError(operator, "Operands must be numbers.")
+
+def is_truthy(object):
+    if object is None: return False
+    if isinstance(object, bool): return bool(object)
+    return True
+
+def is_equal(a, b):
+    if a is None and b is None: return True
+    if a is None: return False
+    return a == b
+
+def stringify(object):
+    if object is None: return "nothing"
+    if type(object) is int: return str(object)
+    if isinstance(object, float):
+        text = str(object)
+        if text.endswith(".0"):
+            text = text[0:len(text)-2]
+        return text
+    if isinstance(object, bool):
+        return "true" if object else "false"
+    if isinstance(object, (List, NumberList)):
+        return "[" + ", ".join(show(item) for item in object) + "]"
+    if isinstance(object, Map):
+        return "{" + ", ".join(f"{show(key)}: {show(value)}" for key, value in object.items()) + "}"
+    # Lists, tuples and dicts from the Python bridge print as Python shows them
+    if isinstance(object, Bytes):
+        return f"<{len(object)} bytes>" # 'decode' them to see the text
+    return str(object)
+
+def show(object):
+    # Inside a list or map, text is quoted so ["a, b"] isn't mistaken for two items
+    if isinstance(object, str):
+        return f'"{object}"'
+    return stringify(object)
+
+class List(list):
+    """ A list made by Genesis ('[1, 2]', a parallel loop...), printed Genesis style: ["a", 1]. """
+    __slots__ = ()
+
+class Map(dict):
+    """ A map made by Genesis ('{"bob": 31}'), printed Genesis style: {"bob": 31}. """
+    __slots__ = ()
+
+class NumberList:
+    """
+    A Genesis list of numbers kept unboxed, as made by element-wise math
+    (see lists.py): a numpy array when NumPy is installed, else array('d').
+    Behaves like any other list: indexing, length, 'for each', printing.
+    """
+    __slots__ = ('data', 'spare')
+
+    def __init__(self, data):
+        self.data = data
+        self.spare = None # numpy array that data is the start of, with room to append (lists.append)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        # Plain floats, so the operators' fast paths apply to the items
+        return iter(self.data.tolist())
+
+    def __getitem__(self, index):
+        return float(self.data[index])
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def __eq__(self, other):
+        if isinstance(other, (NumberList, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        # Lets 'call python numpy.mean with prices' see the numbers themselves
+        import numpy
+        return numpy.asarray(self.data, dtype=dtype)
+
+    def __repr__(self):
+        return f"NumberList({stringify(self)})"
+
+class Bytes:
+    """
+    Raw bytes from the Python bridge (a response body, a file's contents),
+    held as a memoryview: slicing them, searching them and handing them back
+    to Python never copies. They only become text through 'decode'.
+    """
+    __slots__ = ('view', 'start')
+
+    def __init__(self, view, start=0):
+        self.view = view   # memoryview of unsigned bytes
+        self.start = start # Where the view begins in view.obj, to search that in place
+
+    @staticmethod
+    def of(data):
+        return Bytes(memoryview(data))
+
+    def __len__(self):
+        return len(self.view)
+
+    def __iter__(self):
+        return iter(self.view)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self.view))
+            return Bytes(self.view[start:max(start, stop)], self.start + start)
+        return self.view[index]
+
+    def python(self):
+        """ What a Python function gets: the bytes object itself when this is all of it, else the view. """
+        data = self.view.obj
+        if type(data) is bytes and len(data) == len(self.view):
+            return data
+        return self.view
+
+    def __getattr__(self, name):
+        # 'call python data.startswith with ...': the rest of what bytes can do
+        return getattr(self.python(), name)
+
+    def decode(self, encoding="utf-8", errors="strict"):
+        return str(self.view, encoding, errors)
+
+    def __bytes__(self):
+        return self.view.tobytes()
+
+    def __eq__(self, other):
+        if isinstance(other, Bytes):
+            return self.view == other.view
+        if isinstance(other, (bytes, bytearray)):
+            return self.view == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.view.tobytes())
+
+    def __reduce__(self):
+        # A copy, for parallel workers sending results back
+        return (Bytes.of, (self.view.tobytes(),))
+
+    def __repr__(self):
+        return f"Bytes({self.view[:32].tobytes()!r}{'...' if len(self) > 32 else ''})"
@@ -0,0 +1,432 @@
+from bytecode import OpCode
+from compiler import Compiler
+from environment import Frame
+from interpreter import Interpreter
+from values import RuntimeError, List, Map
+from operators import add, subtract, multiply, divide, greater, less, negate, append_text, add_all
+from lists import get_index, set_index
+import bridge
+
+# Opcodes as plain ints, bound once so the dispatch loop compares ints.
+CONST = int(OpCode.CONST)
+POP = int(OpCode.POP)
+GET_GLOBAL = int(OpCode.GET_GLOBAL)
+SET_GLOBAL = int(OpCode.SET_GLOBAL)
+DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+GET_LOCAL = int(OpCode.GET_LOCAL)
+SET_LOCAL = int(OpCode.SET_LOCAL)
+DEFINE_LOCAL = int(OpCode.DEFINE_LOCAL)
+GET_OUTER = int(OpCode.GET_OUTER)
+SET_OUTER = int(OpCode.SET_OUTER)
+ADD = int(OpCode.ADD)
+SUBTRACT = int(OpCode.SUBTRACT)
+MULTIPLY = int(OpCode.MULTIPLY)
+DIVIDE = int(OpCode.DIVIDE)
+GREATER = int(OpCode.GREATER)
+LESS = int(OpCode.LESS)
+EQUAL = int(OpCode.EQUAL)
+NOT_EQUAL = int(OpCode.NOT_EQUAL)
+NEGATE = int(OpCode.NEGATE)
+NOT = int(OpCode.NOT)
+JUMP = int(OpCode.JUMP)
+JUMP_IF_FALSE = int(OpCode.JUMP_IF_FALSE)
+JUMP_IF_FALSE_OR_POP = int(OpCode.JUMP_IF_FALSE_OR_POP)
+JUMP_IF_TRUE_OR_POP = int(OpCode.JUMP_IF_TRUE_OR_POP)
+START_REPEAT = int(OpCode.START_REPEAT)
+REPEAT = int(OpCode.REPEAT)
+CALL = int(OpCode.CALL)
+RETURN = int(OpCode.RETURN)
+MAKE_FUNCTION = int(OpCode.MAKE_FUNCTION)
+PRINT = int(OpCode.PRINT)
+USE = int(OpCode.USE)
+PYTHON_ACCESS = int(OpCode.PYTHON_ACCESS)
+SPEAK = int(OpCode.SPEAK)
+ASK = int(OpCode.ASK)
+DRAW = int(OpCode.DRAW)
+BUILD_LIST = int(OpCode.BUILD_LIST)
+BUILD_MAP = int(OpCode.BUILD_MAP)
+GET_INDEX = int(OpCode.GET_INDEX)
+SET_INDEX = int(OpCode.SET_INDEX)
+APPEND_GLOBAL = int(OpCode.APPEND_GLOBAL)
+APPEND_LOCAL = int(OpCode.APPEND_LOCAL)
+GET_ITER = int(OpCode.GET_ITER)
+FOR_EACH = int(OpCode.FOR_EACH)
+PARALLEL = int(OpCode.PARALLEL)
+FLUSH = int(OpCode.FLUSH)
+CALL_OVER = int(OpCode.CALL_OVER)
+
+# What FOR_EACH gets from an exhausted iterator (no Genesis value is this)
+DONE = object()
+
+# Genesis calls don't use the Python stack, so we set our own limit.
+MAX_CALL_DEPTH = 100000
+
+class VMFunction:
+    def __init__(self, code, closure):
+        self.code = code
+        self.closure = closure # The frame the function was defined in
+
+    def arity(self):
+        return len(self.code.params)
+
+    def __str__(self):
+        return f"<fn {self.code.name}>"
+
+class VM(Interpreter):
+    """
+    Stack-based virtual machine for compiled Genesis bytecode.
+    Shares values, operators and the Python bridge with the tree-walking
+    Interpreter; only the execution strategy differs.
+    """
+
+    def interpret(self, statements, frame_size=0):
+        code = Compiler().compile(statements, frame_size)
+        try:
+            self.run(code)
+        except RuntimeError as error:
+            self.runtime_error(error)
+        finally:
+            self.print_answers()
+            self.output.flush()
+
+    def call_function(self, function, arguments):
+        frame = Frame(function.code.size, function.closure)
+        frame.slots[0:len(arguments)] = arguments
+        if self.call_counts is not None:
+            self.call_counts[function.code.name] += 1
+        try:
+            return self.run(function.code, frame)
+        finally:
+            self.print_answers()
+            self.output.flush()
+
+    def run(self, script, frame=None):
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+
+        globals = self.globals
+        global_values = globals.values
+        python_modules = self.python_modules
+        call_counts = self.call_counts
+        if frame is None:
+            frame = Frame(script.size)
+        slots = frame.slots # Always the current frame's slots
+        code = script.code
+        ip = 0
+
+        while True:
+            op = code[ip]
+            arg = code[ip + 1]
+            ip += 2
+
+            if op == GET_LOCAL:
+                push(slots[arg])
+
+            elif op == GET_GLOBAL:
+                if arg in global_values:
+                    push(global_values[arg])
+                else:
+                    globals.get(arg) # Raises the usual "Undefined variable" error
+
+            elif op == CONST:
+                push(arg)
+
+            elif op == SET_LOCAL:
+                slots[arg] = stack[-1]
+
+            elif op == SET_GLOBAL:
+                if arg in global_values:
+                    global_values[arg] = stack[-1]
+                else:
+                    globals.assign(arg, stack[-1])
+
+            elif op == DEFINE_LOCAL:
+                slots[arg] = pop()
+
+            elif op == POP:
+                pop()
+
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    stack[-1] = left + right
+                elif type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif type(left) is str and type(right) is str:
+                    stack[-1] = left + right
+                else:
+                    stack[-1] = add(arg, left, right)
+
+            elif op == LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    stack[-1] = left < right
+                elif type(left) is float and type(right) is float:
+                    stack[-1] = left < right
+                else:
+                    stack[-1] = less(arg, left, right)
+
+            elif op == JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip = arg
+
+            elif op == JUMP:
+                ip = arg
+
+            elif op == FOR_EACH:
+                item = next(stack[-1], DONE)
+                if item is DONE:
+                    pop()
+                    ip = arg
+                else:
+                    push(item)
+
+            elif op == GET_OUTER:
+                depth, slot = arg
+                outer = frame.enclosing
+                while depth > 1:
+                    outer = outer.enclosing
+                    depth -= 1
+                push(outer.slots[slot])
+
+            elif op == SET_OUTER:
+                frame.assign_at(arg[0], arg[1], stack[-1])
+
+            elif op == APPEND_LOCAL:
+                slot, operators = arg
+                count = len(operators)
+                pieces = stack[-count:]
+                del stack[-count:]
+                text = pop()
+                if type(text) is str:
+                    # 'text' is then the only reference: += grows the string in place
+                    slots[slot] = None
+                    text += append_text(pieces)
+                else:
+                    text = add_all(operators, text, pieces)
+                slots[slot] = text
+                push(text)
+
+            elif op == APPEND_GLOBAL:
+                name, operators = arg
+                count = len(operators)
+                pieces = stack[-count:]
+                del stack[-count:]
+                text = pop()
+                if type(text) is str:
+                    global_values[name] = None
+                    text += append_text(pieces)
+                else:
+                    text = add_all(operators, text, pieces)
+                global_values[name] = text
+                push(text)
+
+            elif op == GET_INDEX:
+                index = pop()
+                stack[-1] = get_index(arg, stack[-1], index)
+
+            elif op == DEFINE_GLOBAL:
+                global_values[arg] = pop()
+
+            elif op == SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    stack[-1] = left - right
+                elif type(left) is float and type(right) is float:
+                    stack[-1] = left - right
+                else:
+                    stack[-1] = subtract(arg, left, right)
+
+            elif op == MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    stack[-1] = left * right
+                elif type(left) is float and type(right) is float:
+                    stack[-1] = left * right
+                else:
+                    stack[-1] = multiply(arg, left, right)
+
+            elif op == GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    stack[-1] = left > right
+                elif type(left) is float and type(right) is float:
+                    stack[-1] = left > right
+                else:
+                    stack[-1] = greater(arg, left, right)
+
+            elif op == EQUAL:
+                right = pop()
+                left = stack[-1]
+                stack[-1] = right is None if left is None else left == right
+
+            elif op == NOT_EQUAL:
+                right = pop()
+                left = stack[-1]
+                stack[-1] = not (right is None if left is None else left == right)
+
+            elif op == DIVIDE:
+                right = pop()
+                stack[-1] = divide(arg, stack[-1], right)
+
+            elif op == CALL:
+                count, paren = arg
+                if count:
+                    arguments = stack[-count:]
+                    del stack[-count:]
+                else:
+                    arguments = []
+                callee = pop()
+
+                if type(callee) is VMFunction:
+                    function = callee.code
+                    if count != len(function.params):
+                        raise RuntimeError(paren, f"Expected {len(function.params)} arguments but got {count}.")
+                    if len(frames) >= MAX_CALL_DEPTH:
+                        raise RuntimeError(paren, "Too much recursion (stack overflow).")
+                    if call_counts is not None:
+                        call_counts[function.name] += 1
+
+                    frames.append((code, ip, frame, len(stack)))
+                    # Lexical scope: chain onto where the function was defined
+                    frame = Frame(function.size, callee.closure)
+                    slots = frame.slots
+                    slots[0:count] = arguments
+                    code = function.code
+                    ip = 0
+                else:
+                    push(self.call_python(paren, callee, arguments))
+
+            elif op == RETURN:
+                value = pop()
+                if not frames:
+                    return value
+                code, ip, frame, base = frames.pop()
+                slots = frame.slots
+                del stack[base:]
+                push(value)
+
+            elif op == PRINT:
+                if self.pending_answers: self.print_answers()
+                self.output.line(self.stringify(pop()))
+
+            elif op == JUMP_IF_FALSE_OR_POP:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = arg
+                else:
+                    pop()
+
+            elif op == JUMP_IF_TRUE_OR_POP:
+                value = stack[-1]
+                if value is None or value is False:
+                    pop()
+                else:
+                    ip = arg
+
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+
+            elif op == NEGATE:
+                value = stack[-1]
+                if type(value) is int or type(value) is float:
+                    stack[-1] = -value
+                else:
+                    stack[-1] = negate(arg, value)
+
+            elif op == START_REPEAT:
+                stack[-1] = self.repeat_count(stack[-1])
+
+            elif op == REPEAT:
+                remaining = stack[-1]
+                if remaining <= 0:
+                    pop()
+                    ip = arg
+                else:
+                    stack[-1] = remaining - 1
+
+            elif op == MAKE_FUNCTION:
+                push(VMFunction(arg, frame))
+
+            elif op == PYTHON_ACCESS:
+                chain, depth, slot, cache = arg
+                if depth is not None:
+                    base = frame.get_at(depth, slot)
+                else:
+                    base = global_values.get(chain[0])
+                    if base is None:
+                        base = python_modules.get(chain[0])
+                # Inline cache hit: the same base as last time, nothing 'use'd since
+                entry = cache.entry
+                if entry[0] is base and entry[1] == bridge.generation:
+                    bridge.hits += 1
+                    push(entry[2])
+                else:
+                    push(self.python_access(chain, base, cache))
+
+            elif op == USE:
+                self.use_module(arg)
+
+            elif op == SPEAK:
+                self.speak(pop())
+
+            elif op == ASK:
+                self.ask(pop())
+
+            elif op == DRAW:
+                if arg:
+                    arguments = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    arguments = []
+                self.draw(pop(), arguments)
+
+            elif op == BUILD_LIST:
+                if arg:
+                    items = List(stack[-arg:])
+                    del stack[-arg:]
+                    push(items)
+                else:
+                    push(List())
+
+            elif op == BUILD_MAP:
+                count, brace = arg
+                map = Map()
+                if count:
+                    entries = stack[-2 * count:]
+                    del stack[-2 * count:]
+                    for i in range(0, 2 * count, 2):
+                        set_index(brace, map, entries[i], entries[i + 1])
+                push(map)
+
+            elif op == SET_INDEX:
+                value = pop()
+                index = pop()
+                stack[-1] = set_index(arg, stack[-1], index, value)
+
+            elif op == GET_ITER:
+                stack[-1] = self.iterate(arg, stack[-1])
+
+            elif op == PARALLEL:
+                body, mode, keyword = arg
+                workers = pop()
+                stack[-1] = self.run_parallel(keyword, VMFunction(body, frame), stack[-1], workers, mode)
+
+            elif op == FLUSH:
+                self.flush()
+
+            elif op == CALL_OVER:
+                items = pop()
+                stack[-1] = self.call_over(arg, stack[-1], items)
+
+            else:
+                raise SystemError(f"Unknown opcode {op}")